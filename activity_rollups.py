@@ -0,0 +1,148 @@
+"""
+Uso:
+    python activity_rollups.py backfill [--days N]
+    python activity_rollups.py reconcile [--days N] [--fix]
+    python activity_rollups.py sketches [--days N]
+
+Ejemplo:
+    python activity_rollups.py backfill --days 90
+    python activity_rollups.py reconcile --days 2 --fix
+"""
+
+import sys
+import argparse
+from datetime import datetime, timedelta
+from pathlib import Path
+
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+env_file = project_root / ".env"
+if not env_file.exists():
+    print("❌ Error: No se encontró el archivo .env")
+    print("   Crea un archivo .env con las variables de configuración")
+    sys.exit(1)
+
+try:
+    from app.core.database import SessionLocal
+    from app.api.repositories.activity_rollup_repository import ActivityRollupRepository, hour_bucket
+    from app.api.repositories.activity_user_sketch_repository import ActivityUserSketchRepository
+    from app.config import settings
+except Exception as e:
+    print(f"❌ Error al importar módulos: {e}")
+    print("\nRevisa tu archivo .env y asegúrate de que DATABASE_URL sea correcta")
+    sys.exit(1)
+
+
+def backfill(since: datetime, until: datetime) -> bool:
+    """Reconstruye las horas de [since, until) a partir de activity_logs, un día por transacción"""
+    db = SessionLocal()
+    try:
+        repo = ActivityRollupRepository(db)
+        total = 0
+        day_start = since
+        while day_start < until:
+            day_end = min(day_start + timedelta(days=1), until)
+            total += repo.rebuild(day_start, day_end)
+            print(f"📦 {day_start:%Y-%m-%d %H:%M} → {day_end:%Y-%m-%d %H:%M}: {total} buckets acumulados")
+            day_start = day_end
+        print(f"✅ Backfill completado: {total} buckets escritos")
+        return True
+    except Exception as e:
+        print(f"❌ Error durante el backfill: {str(e)}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+
+def reconcile(since: datetime, until: datetime, fix: bool) -> bool:
+    """Compara activity_rollups con activity_logs y opcionalmente reconstruye las horas con diferencias"""
+    db = SessionLocal()
+    try:
+        repo = ActivityRollupRepository(db)
+        drift = repo.find_drift(since, until)
+        if not drift:
+            print("✅ Los rollups coinciden con activity_logs")
+            return True
+
+        print(f"⚠️ {len(drift)} buckets con diferencias:")
+        for row in drift[:20]:
+            print(
+                f"   - {row['bucket_start']} {row['user_id']} {row['activity_type']}/{row['action']}: "
+                f"logs={row['raw_count']} rollup={row['rollup_count']}"
+            )
+        if len(drift) > 20:
+            print(f"   ... y {len(drift) - 20} más")
+
+        if not fix:
+            print("💡 Ejecuta de nuevo con --fix para corregirlos")
+            return False
+
+        hours = sorted({hour_bucket(row["bucket_start"]) for row in drift})
+        for hour in hours:
+            repo.rebuild(hour, hour + timedelta(hours=1))
+        print(f"🔧 {len(hours)} horas reconstruidas")
+        return True
+    except Exception as e:
+        print(f"❌ Error durante la reconciliación: {str(e)}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+
+def rebuild_sketches(since: datetime, until: datetime) -> bool:
+    """Reconstruye los sketches diarios de usuarios únicos a partir de activity_logs"""
+    db = SessionLocal()
+    try:
+        repo = ActivityUserSketchRepository(db)
+        day = since.date()
+        while day <= until.date():
+            estimate = repo.rebuild_day(day)
+            print(f"📦 {day:%Y-%m-%d}: ~{estimate} usuarios únicos")
+            day += timedelta(days=1)
+        print("✅ Sketches reconstruidos")
+        return True
+    except Exception as e:
+        print(f"❌ Error al reconstruir los sketches: {str(e)}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mantenimiento de activity_rollups")
+    parser.add_argument("command", choices=["backfill", "reconcile", "sketches"])
+    parser.add_argument("--days", type=int, default=30, help="Días hacia atrás a procesar (por defecto 30)")
+    parser.add_argument("--fix", action="store_true", help="Reconstruir las horas con diferencias (solo reconcile)")
+    args = parser.parse_args()
+
+    # La hora en curso sigue recibiendo escrituras; solo se procesan horas cerradas
+    until = hour_bucket(datetime.utcnow())
+    since = until - timedelta(days=args.days)
+
+    print("="*60)
+    print(f"🚀 {settings.PROJECT_NAME} - Rollups de actividad ({args.command})")
+    print("="*60)
+    print(f"🗓️ Rango: {since:%Y-%m-%d %H:%M} → {until:%Y-%m-%d %H:%M} (UTC)")
+    print("-"*60)
+
+    if args.command == "backfill":
+        success = backfill(since, until)
+    elif args.command == "sketches":
+        success = rebuild_sketches(since, until)
+    else:
+        success = reconcile(since, until, args.fix)
+
+    print("-"*60)
+    if not success:
+        print("💥 Proceso fallido. Revisa los errores anteriores.")
+        sys.exit(1)
+    print("🎉 ¡Proceso completado exitosamente!")
+    print("="*60)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,18 +1,32 @@
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
 from app.config import settings
 import jwt
-from typing import Generator
+from typing import AsyncGenerator
 
 
 security = HTTPBearer()
 
-async def get_database() -> Generator[Session, None, None]:
+async def get_database() -> AsyncGenerator[Session | AsyncSession, None]:
     async for db in get_db():
         yield db
 
 
+async def release_database(db: Session | AsyncSession):
+    """
+    Give the request's connection back to the pool now. Dependency cleanup
+    only runs once the response has finished, which for a streaming
+    response can be hours later.
+    """
+    if isinstance(db, AsyncSession):
+        await db.close()
+    else:
+        await run_in_threadpool(db.close)
+
+
 
 # TODO: implement this sh*t 
\ No newline at end of file
@@ -1,2 +1,4 @@
 from .user import UserProfile, Role
-from .activity_log import ActivityLog
\ No newline at end of file
+from .activity_log import ActivityLog
+from .activity_rollup import ActivityRollup
+from .activity_user_sketch import ActivityUserSketch
\ No newline at end of file
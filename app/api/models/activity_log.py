@@ -1,8 +1,9 @@
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.core.database import Base
+from app.core.database import Base, index_definitions
+from app.config import settings
 import uuid
 
 
@@ -11,22 +12,50 @@ class ActivityLog(Base):
     __tablename__ = "activity_logs"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("user_profiles.id"), nullable=False, index=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("user_profiles.id"), nullable=False)
     
-    activity_type = Column(String(100), nullable=False, index=True)
+    activity_type = Column(String(100), nullable=False)
     action = Column(String(100), nullable=False, index=True)
     description = Column(Text, nullable=True)
     
-    resource_type = Column(String(100), nullable=True, index=True)
+    resource_type = Column(String(100), nullable=True)
     resource_id = Column(UUID(as_uuid=True), nullable=True, index=True)
     
     activity_metadata = Column(JSONB, nullable=True)
     ip_address = Column(String(45), nullable=True)
     user_agent = Column(Text, nullable=True)
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    # A partitioned table's primary key must include the partition key
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        primary_key=settings.ACTIVITY_LOG_PARTITIONING
+    )
 
     user = relationship("UserProfile", back_populates="activity_logs")
 
+    # Keyset pagination walks (created_at, id) newest first, optionally within one filter.
+    # They also serve plain lookups on their leading column, so those columns carry no index of their own.
+    __table_args__ = (
+        Index("ix_activity_logs_created_at_id", "created_at", "id"),
+        Index("ix_activity_logs_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_activity_logs_activity_type_created_at_id", "activity_type", "created_at", "id"),
+        Index("ix_activity_logs_resource_type_created_at_id", "resource_type", "created_at", "id"),
+        {"postgresql_partition_by": "RANGE (created_at)"} if settings.ACTIVITY_LOG_PARTITIONING else {},
+    )
+
     def __repr__(self):
-        return f"<ActivityLog(id={self.id}, user_id={self.user_id}, action='{self.action}')>"
\ No newline at end of file
+        return f"<ActivityLog(id={self.id}, user_id={self.user_id}, action='{self.action}')>"
+
+
+# create_all only indexes tables it creates; startup builds these on existing databases through create_indexes
+ACTIVITY_LOG_INDEXES = index_definitions(ActivityLog.__table__)
+
+# Single-column indexes created before the composite ones; each is a redundant prefix written on every insert.
+# Dropped by drop_replaced_indexes only once the composite that covers it is built.
+REPLACED_ACTIVITY_LOG_INDEXES = {
+    "ix_activity_logs_user_id": "ix_activity_logs_user_id_created_at_id",
+    "ix_activity_logs_activity_type": "ix_activity_logs_activity_type_created_at_id",
+    "ix_activity_logs_resource_type": "ix_activity_logs_resource_type_created_at_id",
+    "ix_activity_logs_created_at": "ix_activity_logs_created_at_id",
+}
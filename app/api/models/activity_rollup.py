@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, DateTime, BigInteger, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+
+
+
+class ActivityRollup(Base):
+    """Hourly activity counts per (user, activity_type, action), maintained alongside activity_logs"""
+    __tablename__ = "activity_rollups"
+
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("user_profiles.id", ondelete="CASCADE"), primary_key=True)
+    activity_type = Column(String(100), primary_key=True)
+    action = Column(String(100), primary_key=True)
+
+    count = Column(BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_activity_rollups_user_id_bucket_start", "user_id", "bucket_start"),
+    )
\ No newline at end of file
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Date, DateTime, LargeBinary
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+
+class ActivityUserSketch(Base):
+    """Per-day HyperLogLog sketch (zlib-compressed registers) of the users who logged activity"""
+    __tablename__ = "activity_user_sketches"
+
+    day = Column(Date, primary_key=True)
+    registers = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
\ No newline at end of file
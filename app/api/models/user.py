@@ -1,8 +1,8 @@
-from sqlalchemy import Column, String, DateTime, Text, Boolean, ForeignKey
+from sqlalchemy import Column, String, DateTime, Text, Boolean, Integer, ForeignKey, Index, DDL, event
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.core.database import Base
+from app.core.database import Base, index_definitions
 import uuid
 
 
@@ -29,10 +29,27 @@ class UserProfile(Base):
     
     activity_logs = relationship("ActivityLog", back_populates="user", cascade="all, delete-orphan")
     
+    # Keyset pagination of admin user listings walks (sort column, id)
+    __table_args__ = (
+        Index("ix_user_profiles_created_at_id", "created_at", "id"),
+        Index("ix_user_profiles_updated_at_id", "updated_at", "id"),
+        Index("ix_user_profiles_role_id_created_at_id", "role_id", "created_at", "id"),
+    )
+    
     def __repr__(self):
         return f"<UserProfile(id={self.id}, full_name='{self.full_name}')>"
 
 
+# create_all only indexes tables it creates; startup builds these on existing databases through create_indexes
+USER_PROFILE_INDEXES = index_definitions(UserProfile.__table__)
+
+# Trigram indexes serve ILIKE '%term%' and similarity search; built by create_trigram_indexes only where pg_trgm can be enabled
+TRIGRAM_INDEXES = {
+    "ix_user_profiles_full_name_trgm": ("user_profiles", "full_name"),
+    "ix_user_profiles_supabase_user_id_trgm": ("user_profiles", "supabase_user_id"),
+}
+
+
 class Role(Base):
     __tablename__ = "roles"
 
@@ -42,10 +59,21 @@ class Role(Base):
 
     permissions = Column(JSONB, nullable = True, default = list)
 
+    # Maintained by UserRepository alongside every role assignment; repaired by reconcile_users_count
+    users_count = Column(Integer, nullable = False, default = 0, server_default = "0")
+
     created_at = Column(DateTime(timezone = True), server_default = func.now())
     updated_at = Column(DateTime(timezone = True), server_default = func.now(), onupdate = func.now())
 
     users = relationship("UserProfile", back_populates = "role")
 
     def __repr__(self):
-        return f"<Role(id={self.id}, name='{self.name}')>"
\ No newline at end of file
+        return f"<Role(id={self.id}, name='{self.name}')>"
+
+
+# create_all never alters existing tables, so add the counter column to databases created before it
+event.listen(
+    Base.metadata,
+    "after_create",
+    DDL("ALTER TABLE roles ADD COLUMN IF NOT EXISTS users_count INTEGER NOT NULL DEFAULT 0").execute_if(dialect="postgresql")
+)
\ No newline at end of file
@@ -1,11 +1,23 @@
-from .base import BaseRepository
-from .user_repository import UserRepository  
-from .role_repository import RoleRepository
-from .activity_log_repository import ActivityLogRepository
+from .base import BaseRepository, AsyncRepository, encode_cursor, decode_cursor
+from .user_repository import UserRepository, AsyncUserRepository
+from .role_repository import RoleRepository, AsyncRoleRepository
+from .activity_log_repository import ActivityLogRepository, AsyncActivityLogRepository
+from .activity_rollup_repository import ActivityRollupRepository, AsyncActivityRollupRepository
+from .activity_user_sketch_repository import ActivityUserSketchRepository, AsyncActivityUserSketchRepository
 
 __all__ = [
     "BaseRepository",
+    "AsyncRepository",
+    "encode_cursor",
+    "decode_cursor",
     "UserRepository", 
+    "AsyncUserRepository",
     "RoleRepository",
-    "ActivityLogRepository"
+    "AsyncRoleRepository",
+    "ActivityLogRepository",
+    "AsyncActivityLogRepository",
+    "ActivityRollupRepository",
+    "AsyncActivityRollupRepository",
+    "ActivityUserSketchRepository",
+    "AsyncActivityUserSketchRepository"
 ]
\ No newline at end of file
@@ -1,12 +1,16 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple, Iterator
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import desc
-from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert as pg_insert, JSONB
+from sqlalchemy import desc, insert, update, select, func, distinct, and_, or_, text, literal
+from datetime import datetime, timedelta, date
 from uuid import UUID
 
-from app.api.repositories.base import BaseRepository
+from app.api.repositories.base import BaseRepository, AsyncRepository, replica_read
 from app.api.models.activity_log import ActivityLog
 from app.api.models.user import UserProfile
+from app.api.repositories.activity_rollup_repository import ActivityRollupRepository, count_rollups
+from app.config import settings
 
 
 
@@ -41,9 +45,75 @@ class ActivityLogRepository(BaseRepository[ActivityLog, dict, dict]):
             "created_at": datetime.utcnow()
         }
         
-        return self.create(log_data)
+        if not settings.ACTIVITY_ROLLUPS_ENABLED:
+            return self.create(log_data)
+        
+        activity_log = ActivityLog(**log_data)
+        self.db.add(activity_log)
+        ActivityRollupRepository(self.db).increment(count_rollups([log_data]))
+        self.db.commit()
+        self.db.refresh(activity_log)
+        return activity_log
+
+
+    def bulk_create_activity_logs(self, rows: List[Dict[str, Any]], skip_existing: bool = False) -> List[Dict[str, Any]]:
+        """
+        Insert many activity rows in one multi-row INSERT; rows carry their own ids.
+        With skip_existing, rows already present are ignored so a replay is idempotent.
+        Returns the rows actually inserted.
+        """
+        if not rows:
+            return []
+
+        if skip_existing:
+            inserted_ids = set(self.db.execute(
+                pg_insert(ActivityLog).values(rows).on_conflict_do_nothing().returning(ActivityLog.id)
+            ).scalars())
+            rows = [row for row in rows if row["id"] in inserted_ids]
+        else:
+            self.db.execute(insert(ActivityLog), rows)
+        if settings.ACTIVITY_ROLLUPS_ENABLED:
+            ActivityRollupRepository(self.db).increment(count_rollups(rows))
+        self.db.commit()
+        return rows
+
+
+    def merge_activity_metadata(self, updates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Merge each update's "metadata" keys into the row with its id and created_at, then commit.
+        Returns the updates whose row is not in the table (yet).
+        """
+        unmatched = []
+        for row in updates:
+            result = self.db.execute(
+                update(ActivityLog).where(
+                    ActivityLog.id == row["id"],
+                    ActivityLog.created_at == row["created_at"]
+                ).values(
+                    activity_metadata=func.coalesce(ActivityLog.activity_metadata, literal({}, JSONB)).op("||")(
+                        literal(row["metadata"], JSONB)
+                    )
+                )
+            )
+            if result.rowcount == 0:
+                unmatched.append(row)
+        self.db.commit()
+        return unmatched
+
 
+    def notify_activities(self, channel: str, payloads: List[str], commit: bool = False):
+        """Queue NOTIFYs in the current transaction; PostgreSQL only delivers them on commit"""
+        try:
+            for payload in payloads:
+                self.db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": channel, "payload": payload})
+            if commit:
+                self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
 
+
+    @replica_read
     def get_user_activities(
         self,
         user_id: UUID,
@@ -65,6 +135,7 @@ class ActivityLogRepository(BaseRepository[ActivityLog, dict, dict]):
         return query.order_by(desc(ActivityLog.created_at)).offset(offset).limit(limit).all()
 
 
+    @replica_read
     def get_recent_activities(
         self,
         limit: int = 100,
@@ -80,36 +151,312 @@ class ActivityLogRepository(BaseRepository[ActivityLog, dict, dict]):
         return query.order_by(desc(ActivityLog.created_at)).limit(limit).all()
 
 
+    def _activity_filters(
+        self,
+        user_id: UUID = None,
+        activity_type: str = None,
+        resource_type: str = None
+    ) -> list:
+        filters = []
+        if user_id:
+            filters.append(ActivityLog.user_id == user_id)
+        if activity_type:
+            filters.append(ActivityLog.activity_type == activity_type)
+        if resource_type:
+            filters.append(ActivityLog.resource_type == resource_type)
+        return filters
+
+
+    @replica_read
+    def get_activities_page(
+        self,
+        limit: int = 50,
+        after: Optional[Tuple[datetime, UUID]] = None,
+        user_id: UUID = None,
+        activity_type: str = None,
+        resource_type: str = None
+    ) -> List[ActivityLog]:
+        """
+        Keyset page ordered by (created_at, id) descending, starting after
+        the given key. Returns up to limit + 1 rows so callers can tell
+        whether another page exists.
+        """
+        query = self.db.query(ActivityLog).options(
+            joinedload(ActivityLog.user)
+        ).filter(*self._activity_filters(user_id, activity_type, resource_type))
+        
+        if after:
+            after_created_at, after_id = after
+            query = query.filter(or_(
+                ActivityLog.created_at < after_created_at,
+                and_(ActivityLog.created_at == after_created_at, ActivityLog.id < after_id)
+            ))
+        
+        return query.order_by(
+            desc(ActivityLog.created_at), desc(ActivityLog.id)
+        ).limit(limit + 1).all()
+
+
+    @replica_read
+    def estimate_activities_count(
+        self,
+        user_id: UUID = None,
+        activity_type: str = None,
+        resource_type: str = None,
+        cap: int = 10000
+    ) -> Tuple[int, bool]:
+        """
+        Cheap total for paginated listings, returned with an `is_estimate` flag.
+        Unfiltered totals come from the planner statistics on PostgreSQL;
+        filtered totals are counted exactly up to `cap` rows.
+        """
+        filters = self._activity_filters(user_id, activity_type, resource_type)
+        
+        if not filters and self.db.get_bind().dialect.name == "postgresql":
+            if settings.ACTIVITY_LOG_PARTITIONING:
+                # A partitioned parent has no statistics of its own (reltuples = -1); sum the analyzed partitions
+                estimate = self.db.execute(text(
+                    "SELECT CASE WHEN bool_or(child.reltuples >= 0) "
+                    "THEN sum(greatest(child.reltuples, 0))::bigint END FROM pg_inherits "
+                    "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                    "WHERE pg_inherits.inhparent = 'activity_logs'::regclass"
+                )).scalar()
+            else:
+                estimate = self.db.execute(
+                    text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'activity_logs'::regclass")
+                ).scalar()
+            if estimate is not None and estimate >= 0:
+                return int(estimate), True
+        
+        capped = self.db.query(ActivityLog.id).filter(*filters).limit(cap + 1).subquery()
+        count = self.db.query(func.count()).select_from(capped).scalar() or 0
+        if count > cap:
+            return cap, True
+        return count, False
+
+
+    @replica_read
     def get_activity_stats(
         self,
         user_id: UUID = None,
-        days_back: int = 30
+        days_back: int = 30,
+        count_unique_users: bool = True,
+        since: datetime = None
     ) -> Dict[str, Any]:
-        """Get activity statistics"""
-        since_date = datetime.utcnow() - timedelta(days=days_back)
-        query = self.db.query(ActivityLog).filter(ActivityLog.created_at >= since_date)
+        """Get activity statistics, aggregated in SQL, from `since` (default: days_back ago)"""
+        since_date = since or datetime.utcnow() - timedelta(days=days_back)
+        filters = [ActivityLog.created_at >= since_date]
         
         if user_id:
-            query = query.filter(ActivityLog.user_id == user_id)
+            filters.append(ActivityLog.user_id == user_id)
         
         # Count by activity type
-        activity_counts = {}
-        for log in query.all():
-            activity_counts[log.activity_type] = activity_counts.get(log.activity_type, 0) + 1
+        activity_counts = dict(
+            self.db.query(ActivityLog.activity_type, func.count(ActivityLog.id))
+            .filter(*filters)
+            .group_by(ActivityLog.activity_type)
+            .all()
+        )
+        
+        unique_users = None
+        if count_unique_users:
+            unique_users = self.db.query(
+                func.count(distinct(ActivityLog.user_id))
+            ).filter(*filters).scalar() or 0
+        
+        day = func.date(ActivityLog.created_at).label("day")
+        daily_rows = self.db.query(day, func.count(ActivityLog.id)).filter(
+            *filters
+        ).group_by(day).order_by(day).all()
+        
+        activity_count = func.count(ActivityLog.id).label("activity_count")
+        top_user = self.db.query(
+            ActivityLog.user_id, UserProfile.full_name, activity_count
+        ).join(
+            UserProfile, UserProfile.id == ActivityLog.user_id
+        ).filter(*filters).group_by(
+            ActivityLog.user_id, UserProfile.full_name
+        ).order_by(desc(activity_count)).limit(1).first()
         
         return {
-            "total_activities": query.count(),
+            "total_activities": sum(activity_counts.values()),
             "activity_breakdown": activity_counts,
+            "unique_users": unique_users,
+            "most_active_user": {
+                "user_id": str(top_user.user_id),
+                "user_name": top_user.full_name or "Unknown",
+                "activity_count": top_user.activity_count
+            } if top_user else None,
+            "daily_activity": [
+                {"date": str(day_value), "count": count}
+                for day_value, count in daily_rows
+            ],
             "period_days": days_back
         }
 
 
-    def cleanup_old_logs(self, days_to_keep: int = 90) -> int:
-        cutoff_date = datetime.utcnow() - timedelta(days=days_to_keep)
+    def stream_activities(
+        self,
+        start: datetime = None,
+        end: datetime = None,
+        user_id: UUID = None,
+        batch_size: int = 1000
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield activity rows oldest first as plain dicts through a server-side
+        cursor, holding at most `batch_size` rows in memory at a time.
+        """
+        statement = select(ActivityLog.__table__)
+        
+        if start:
+            statement = statement.where(ActivityLog.created_at >= start)
+        if end:
+            statement = statement.where(ActivityLog.created_at < end)
+        if user_id:
+            statement = statement.where(ActivityLog.user_id == user_id)
+        
+        result = self.db.execute(
+            statement.order_by(ActivityLog.created_at, ActivityLog.id),
+            execution_options={"yield_per": batch_size}
+        )
+        try:
+            for row in result.mappings():
+                yield dict(row)
+        finally:
+            result.close()
+
+
+    def get_expired_batch(
+        self,
+        cutoff: datetime,
+        limit: int,
+        after: Optional[Tuple[datetime, UUID]] = None
+    ) -> List[Dict[str, Any]]:
+        """Oldest rows created before the cutoff, in (created_at, id) order, as plain dicts"""
+        query = self.db.query(ActivityLog.__table__).filter(ActivityLog.created_at < cutoff)
+        
+        if after is not None:
+            after_created_at, after_id = after
+            query = query.filter(or_(
+                ActivityLog.created_at > after_created_at,
+                and_(ActivityLog.created_at == after_created_at, ActivityLog.id > after_id)
+            ))
+        
+        rows = query.order_by(ActivityLog.created_at, ActivityLog.id).limit(limit).all()
+        return [dict(row._mapping) for row in rows]
+
+
+    def delete_activity_logs(self, ids: List[UUID], created_before: datetime) -> int:
+        """Delete one batch by id and commit, so each batch holds its locks briefly"""
+        if not ids:
+            return 0
         
+        # The created_at bound lets a partitioned table prune to the old partitions
         deleted_count = self.db.query(ActivityLog).filter(
-            ActivityLog.created_at < cutoff_date
-        ).delete()
+            ActivityLog.id.in_(ids),
+            ActivityLog.created_at < created_before
+        ).delete(synchronize_session=False)
+        
+        self.db.commit()
+        return deleted_count
+
+
+    def ensure_partitions(self, months_ahead: int = 3) -> List[str]:
+        """Create the monthly partitions from the current month up to months_ahead (idempotent)"""
+        month_start = datetime.utcnow().date().replace(day=1)
+        created = []
+        
+        for offset in range(months_ahead + 1):
+            lower = _add_months(month_start, offset)
+            upper = _add_months(lower, 1)
+            name = _partition_name(lower)
+            bounds = f"FOR VALUES FROM ('{lower.isoformat()} 00:00:00+00') TO ('{upper.isoformat()} 00:00:00+00')"
+            if self._default_partition_holds(lower, upper):
+                self._partition_from_default(name, bounds, lower, upper)
+            else:
+                self.db.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF activity_logs {bounds}"))
+            created.append(name)
         
+        self.db.execute(text(
+            "CREATE TABLE IF NOT EXISTS activity_logs_default PARTITION OF activity_logs DEFAULT"
+        ))
         self.db.commit()
-        return deleted_count
\ No newline at end of file
+        return created
+
+
+    def _default_partition_holds(self, lower: date, upper: date) -> bool:
+        """Whether a month without its own partition already has rows in the DEFAULT partition"""
+        if self.db.execute(text("SELECT to_regclass(:name)"), {"name": _partition_name(lower)}).scalar() is not None:
+            return False
+        if self.db.execute(text("SELECT to_regclass('activity_logs_default')")).scalar() is None:
+            return False
+        return self.db.execute(
+            text("SELECT 1 FROM activity_logs_default WHERE created_at >= :lower AND created_at < :upper LIMIT 1"),
+            {"lower": lower, "upper": upper}
+        ).first() is not None
+
+
+    def _partition_from_default(self, name: str, bounds: str, lower: date, upper: date):
+        """
+        CREATE TABLE ... PARTITION OF fails while the DEFAULT partition holds rows in the
+        new range (maintenance paused, or months_ahead lowered). Build the partition as a
+        plain table, move those rows into it, then attach it.
+        """
+        # Attaching rechecks the default partition; keep inserts from landing there in between
+        self.db.execute(text("LOCK TABLE activity_logs_default IN ACCESS EXCLUSIVE MODE"))
+        self.db.execute(text(f"CREATE TABLE {name} (LIKE activity_logs INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+        self.db.execute(
+            text(
+                "WITH moved AS ("
+                "DELETE FROM activity_logs_default WHERE created_at >= :lower AND created_at < :upper RETURNING *"
+                f") INSERT INTO {name} SELECT * FROM moved"
+            ),
+            {"lower": lower, "upper": upper}
+        )
+        self.db.execute(text(f"ALTER TABLE activity_logs ATTACH PARTITION {name} {bounds}"))
+
+
+    def drop_partitions_before(self, cutoff: datetime) -> Dict[str, int]:
+        """
+        Detach and drop every monthly partition that ends before the cutoff.
+        Returns the planner's row estimate of each dropped partition.
+        """
+        partitions = self.db.execute(text(
+            "SELECT child.relname, child.reltuples::bigint FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = 'activity_logs'::regclass"
+        )).all()
+        
+        dropped = {}
+        for name, estimated_rows in partitions:
+            month = _partition_month(name)
+            if month is None or _add_months(month, 1) > cutoff.date():
+                continue
+            self.db.execute(text(f"ALTER TABLE activity_logs DETACH PARTITION {name}"))
+            self.db.execute(text(f"DROP TABLE {name}"))
+            dropped[name] = max(int(estimated_rows), 0)
+        
+        self.db.commit()
+        return dropped
+
+
+def _add_months(day: date, months: int) -> date:
+    month_index = day.month - 1 + months
+    return date(day.year + month_index // 12, month_index % 12 + 1, 1)
+
+
+def _partition_name(month: date) -> str:
+    return f"activity_logs_p{month:%Y_%m}"
+
+
+def _partition_month(name: str) -> Optional[date]:
+    try:
+        return datetime.strptime(name, "activity_logs_p%Y_%m").date()
+    except ValueError:
+        return None
+
+
+
+class AsyncActivityLogRepository(AsyncRepository[ActivityLogRepository]):
+    def __init__(self, db: Session | AsyncSession):
+        super().__init__(db, ActivityLogRepository)
\ No newline at end of file
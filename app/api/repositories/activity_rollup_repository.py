@@ -0,0 +1,210 @@
+from typing import List, Dict, Any, Tuple, Iterable
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import desc, func, distinct, select, and_, text
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from app.api.repositories.base import BaseRepository, AsyncRepository, replica_read
+from app.api.models.activity_log import ActivityLog
+from app.api.models.activity_rollup import ActivityRollup
+from app.api.models.user import UserProfile
+
+
+RollupKey = Tuple[datetime, UUID, str, str]
+
+
+def hour_bucket(at: datetime) -> datetime:
+    return at.replace(minute=0, second=0, microsecond=0)
+
+
+def count_rollups(rows: Iterable[Dict[str, Any]]) -> Dict[RollupKey, int]:
+    """Fold activity rows into hourly (bucket, user, type, action) counts"""
+    counts: Dict[RollupKey, int] = {}
+    for row in rows:
+        key = (hour_bucket(row["created_at"]), row["user_id"], row["activity_type"], row["action"])
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+
+class ActivityRollupRepository(BaseRepository[ActivityRollup, dict, dict]):
+    def __init__(self, db: Session):
+        super().__init__(db, ActivityRollup)
+
+
+    def increment(self, counts: Dict[RollupKey, int]) -> int:
+        """
+        Upsert count deltas in one statement. Does not commit, so callers
+        apply it in the same transaction as the activity rows it counts.
+        """
+        if not counts:
+            return 0
+
+        values = [
+            {"bucket_start": bucket_start, "user_id": user_id, "activity_type": activity_type, "action": action, "count": count}
+            for (bucket_start, user_id, activity_type, action), count in sorted(counts.items(), key=lambda item: item[0])
+        ]
+        statement = insert(ActivityRollup).values(values)
+        self.db.execute(statement.on_conflict_do_update(
+            index_elements=[ActivityRollup.bucket_start, ActivityRollup.user_id, ActivityRollup.activity_type, ActivityRollup.action],
+            set_={"count": ActivityRollup.count + statement.excluded.count}
+        ))
+        return len(values)
+
+
+    def rebuild(self, since: datetime, until: datetime) -> int:
+        """Recompute every bucket in [since, until) from the raw activity_logs"""
+        since, until = hour_bucket(since), hour_bucket(until)
+
+        # Hold off concurrent increment() upserts until commit: one landing between the DELETE and
+        # the INSERT would collide with the rebuilt row, or be counted both there and in the raw logs
+        self.db.execute(text("LOCK TABLE activity_rollups IN SHARE ROW EXCLUSIVE MODE"))
+
+        self.db.query(ActivityRollup).filter(
+            ActivityRollup.bucket_start >= since,
+            ActivityRollup.bucket_start < until
+        ).delete(synchronize_session=False)
+
+        bucket = func.date_trunc("hour", ActivityLog.created_at)
+        source = select(
+            bucket, ActivityLog.user_id, ActivityLog.activity_type, ActivityLog.action, func.count()
+        ).where(
+            ActivityLog.created_at >= since,
+            ActivityLog.created_at < until
+        ).group_by(bucket, ActivityLog.user_id, ActivityLog.activity_type, ActivityLog.action)
+
+        result = self.db.execute(insert(ActivityRollup).from_select(
+            ["bucket_start", "user_id", "activity_type", "action", "count"], source
+        ))
+        self.db.commit()
+        return result.rowcount
+
+
+    def find_drift(self, since: datetime, until: datetime) -> List[Dict[str, Any]]:
+        """Buckets in [since, until) whose stored count differs from the raw logs"""
+        since, until = hour_bucket(since), hour_bucket(until)
+
+        bucket = func.date_trunc("hour", ActivityLog.created_at).label("bucket_start")
+        raw = select(
+            bucket,
+            ActivityLog.user_id,
+            ActivityLog.activity_type,
+            ActivityLog.action,
+            func.count().label("count")
+        ).where(
+            ActivityLog.created_at >= since,
+            ActivityLog.created_at < until
+        ).group_by(bucket, ActivityLog.user_id, ActivityLog.activity_type, ActivityLog.action).subquery()
+
+        stored = select(ActivityRollup).where(
+            ActivityRollup.bucket_start >= since,
+            ActivityRollup.bucket_start < until
+        ).subquery()
+
+        keys = ("bucket_start", "user_id", "activity_type", "action")
+        rows = self.db.execute(
+            select(
+                *[func.coalesce(raw.c[key], stored.c[key]).label(key) for key in keys],
+                func.coalesce(raw.c["count"], 0).label("raw_count"),
+                func.coalesce(stored.c["count"], 0).label("rollup_count")
+            ).select_from(
+                raw.join(stored, and_(*[raw.c[key] == stored.c[key] for key in keys]), full=True)
+            ).where(
+                func.coalesce(raw.c["count"], 0) != func.coalesce(stored.c["count"], 0)
+            )
+        ).all()
+        return [dict(row._mapping) for row in rows]
+
+
+    @replica_read
+    def get_activity_stats(
+        self,
+        user_id: UUID = None,
+        days_back: int = 30,
+        count_unique_users: bool = True,
+        since: datetime = None
+    ) -> Dict[str, Any]:
+        """Same shape as ActivityLogRepository.get_activity_stats, read from hourly buckets"""
+        since_bucket = hour_bucket(since or datetime.utcnow() - timedelta(days=days_back))
+        filters = [ActivityRollup.bucket_start >= since_bucket]
+
+        if user_id:
+            filters.append(ActivityRollup.user_id == user_id)
+
+        total = func.sum(ActivityRollup.count)
+
+        activity_counts = {
+            activity_type: int(count)
+            for activity_type, count in self.db.query(ActivityRollup.activity_type, total)
+            .filter(*filters)
+            .group_by(ActivityRollup.activity_type)
+            .all()
+        }
+
+        unique_users = None
+        if count_unique_users:
+            unique_users = self.db.query(
+                func.count(distinct(ActivityRollup.user_id))
+            ).filter(*filters).scalar() or 0
+
+        day = func.date(ActivityRollup.bucket_start).label("day")
+        daily_rows = self.db.query(day, total).filter(
+            *filters
+        ).group_by(day).order_by(day).all()
+
+        activity_count = total.label("activity_count")
+        top_user = self.db.query(
+            ActivityRollup.user_id, UserProfile.full_name, activity_count
+        ).join(
+            UserProfile, UserProfile.id == ActivityRollup.user_id
+        ).filter(*filters).group_by(
+            ActivityRollup.user_id, UserProfile.full_name
+        ).order_by(desc(activity_count)).limit(1).first()
+
+        return {
+            "total_activities": sum(activity_counts.values()),
+            "activity_breakdown": activity_counts,
+            "unique_users": unique_users,
+            "most_active_user": {
+                "user_id": str(top_user.user_id),
+                "user_name": top_user.full_name or "Unknown",
+                "activity_count": int(top_user.activity_count)
+            } if top_user else None,
+            "daily_activity": [
+                {"date": str(day_value), "count": int(count)}
+                for day_value, count in daily_rows
+            ],
+            "period_days": days_back
+        }
+
+
+    @replica_read
+    def get_activity_trend(
+        self,
+        days_back: int = 7,
+        granularity: str = "hour",
+        user_id: UUID = None,
+        activity_type: str = None
+    ) -> List[Dict[str, Any]]:
+        """Activity counts per hour or day, one row per non-empty bucket"""
+        since_bucket = hour_bucket(datetime.utcnow() - timedelta(days=days_back))
+        filters = [ActivityRollup.bucket_start >= since_bucket]
+
+        if user_id:
+            filters.append(ActivityRollup.user_id == user_id)
+        if activity_type:
+            filters.append(ActivityRollup.activity_type == activity_type)
+
+        bucket = func.date_trunc(granularity, ActivityRollup.bucket_start).label("bucket")
+        rows = self.db.query(bucket, func.sum(ActivityRollup.count)).filter(
+            *filters
+        ).group_by(bucket).order_by(bucket).all()
+
+        return [{"bucket": bucket_value, "count": int(count)} for bucket_value, count in rows]
+
+
+class AsyncActivityRollupRepository(AsyncRepository[ActivityRollupRepository]):
+    def __init__(self, db: Session | AsyncSession):
+        super().__init__(db, ActivityRollupRepository)
\ No newline at end of file
@@ -0,0 +1,80 @@
+from typing import Dict
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import select
+from datetime import date, datetime, time, timedelta
+
+from app.api.repositories.base import BaseRepository, AsyncRepository, replica_read
+from app.api.models.activity_log import ActivityLog
+from app.api.models.activity_user_sketch import ActivityUserSketch
+from app.core.hyperloglog import HyperLogLog
+
+
+
+class ActivityUserSketchRepository(BaseRepository[ActivityUserSketch, dict, dict]):
+    def __init__(self, db: Session):
+        super().__init__(db, ActivityUserSketch)
+
+
+    def merge_days(self, sketches: Dict[date, HyperLogLog]) -> int:
+        """Merge in-memory sketches into the stored ones, locking each day's row while it is rewritten"""
+        if not sketches:
+            return 0
+
+        days = sorted(sketches)
+        self.db.execute(
+            insert(ActivityUserSketch)
+            .values([{"day": day, "registers": HyperLogLog().to_bytes()} for day in days])
+            .on_conflict_do_nothing(index_elements=[ActivityUserSketch.day])
+        )
+        stored_rows = self.db.query(ActivityUserSketch).filter(
+            ActivityUserSketch.day.in_(days)
+        ).order_by(ActivityUserSketch.day).with_for_update().all()
+
+        for stored in stored_rows:
+            merged = HyperLogLog.from_bytes(stored.registers).merge(sketches[stored.day])
+            stored.registers = merged.to_bytes()
+
+        self.db.commit()
+        return len(stored_rows)
+
+
+    @replica_read
+    def get_days(self, start: date, end: date) -> Dict[date, HyperLogLog]:
+        """Stored sketches for every day in [start, end]"""
+        rows = self.db.query(ActivityUserSketch.day, ActivityUserSketch.registers).filter(
+            ActivityUserSketch.day >= start,
+            ActivityUserSketch.day <= end
+        ).all()
+        return {day: HyperLogLog.from_bytes(registers) for day, registers in rows}
+
+
+    def rebuild_day(self, day: date, batch_size: int = 10000) -> int:
+        """Recompute one day's sketch from the raw logs; returns its estimate"""
+        start = datetime.combine(day, time.min)
+        sketch = HyperLogLog()
+        result = self.db.execute(
+            select(ActivityLog.user_id).where(
+                ActivityLog.created_at >= start,
+                ActivityLog.created_at < start + timedelta(days=1)
+            ).distinct(),
+            execution_options={"yield_per": batch_size}
+        )
+        try:
+            sketch.update(result.scalars())
+        finally:
+            result.close()
+
+        statement = insert(ActivityUserSketch).values(day=day, registers=sketch.to_bytes())
+        self.db.execute(statement.on_conflict_do_update(
+            index_elements=[ActivityUserSketch.day],
+            set_={"registers": statement.excluded.registers}
+        ))
+        self.db.commit()
+        return sketch.count()
+
+
+class AsyncActivityUserSketchRepository(AsyncRepository[ActivityUserSketchRepository]):
+    def __init__(self, db: Session | AsyncSession):
+        super().__init__(db, ActivityUserSketchRepository)
\ No newline at end of file
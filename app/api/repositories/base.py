@@ -1,13 +1,103 @@
+import base64
+import functools
+import json
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar, Optional, List, Dict, Any
+from typing import Generic, TypeVar, Optional, List, Dict, Any, Union
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, asc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, desc, asc, exc, case, func
 from uuid import UUID
 
+from app.core.database import trigram_available
+
 
 ModelType = TypeVar("ModelType")
 CreateSchemaType = TypeVar("CreateSchemaType")
 UpdateSchemaType = TypeVar("UpdateSchemaType")
+RepositoryType = TypeVar("RepositoryType", bound="BaseRepository")
+
+
+
+def encode_cursor(*values: Any) -> str:
+    """Opaque keyset cursor from the sort key values of the last row of a page"""
+    payload = json.dumps([value.isoformat() if hasattr(value, "isoformat") else str(value) for value in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[str]:
+    """Inverse of encode_cursor; raises ValueError on malformed input"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def text_match(columns: List[Any], term: str, fuzzy: bool = False):
+    """
+    Case-insensitive substring match over the columns. With pg_trgm both
+    ILIKE and the fuzzy `%` similarity operator are served by trigram GIN
+    indexes; without it this degrades to a plain LIKE scan.
+    """
+    pattern = f"%{escape_like(term)}%"
+    conditions = [column.ilike(pattern, escape="\\") for column in columns]
+    if fuzzy:
+        conditions.extend(column.op("%")(term) for column in columns)
+    return or_(*conditions)
+
+
+def text_rank(columns: List[Any], term: str, trigram: bool = False):
+    """ORDER BY clause putting the best matches first: trigram similarity with pg_trgm, exact/prefix/substring otherwise"""
+    if trigram:
+        return func.greatest(*[func.similarity(column, term) for column in columns]).desc().nulls_last()
+
+    lowered = term.lower()
+    prefix = f"{escape_like(lowered)}%"
+    return case(
+        (or_(*[func.lower(column) == lowered for column in columns]), 0),
+        (or_(*[func.lower(column).like(prefix, escape="\\") for column in columns]), 1),
+        else_=2
+    )
+
+
+def replica_read(method):
+    """
+    Marks a repository method as read-only so its queries may be served by
+    a read replica (see RoutingSession). If the replica turns out to be
+    unreachable the call is retried once on the primary, unless the session
+    holds unflushed changes the rollback before the retry would discard.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        info = self.db.info
+        if info.get("use_replica"):
+            return method(self, *args, **kwargs)
+
+        info["use_replica"] = True
+        try:
+            return method(self, *args, **kwargs)
+        except exc.OperationalError:
+            replica = info.pop("replica", None)
+            if replica is None:
+                raise
+            info["replicas"].mark_down(replica)
+            if self.db.new or self.db.dirty or self.db.deleted:
+                raise
+            self.db.rollback()
+            info["use_replica"] = False
+            return method(self, *args, **kwargs)
+        finally:
+            info["use_replica"] = False
+
+    return wrapper
 
 
 
@@ -143,17 +233,49 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType], ABC
         return []
 
 
-    def search(self, search_term: str, search_fields: List[str]) -> List[ModelType]:
+    def search(self, search_term: str, search_fields: List[str], limit: int = 50) -> List[ModelType]:
         if not search_term or not search_fields:
             return []
         
-        search_conditions = []
-        for field in search_fields:
-            if hasattr(self.model, field):
-                search_conditions.append(
-                    getattr(self.model, field).like(f"%{search_term}%")
-                )
+        columns = [getattr(self.model, field) for field in search_fields if hasattr(self.model, field)]
         
-        if search_conditions:
-            return self.db.query(self.model).filter(or_(*search_conditions)).all()
-        return []
\ No newline at end of file
+        if columns:
+            return self.db.query(self.model).filter(
+                text_match(columns, search_term)
+            ).order_by(
+                text_rank(columns, search_term, trigram_available(self.db.get_bind()))
+            ).limit(limit).all()
+        return []
+
+
+
+class AsyncRepository(Generic[RepositoryType]):
+    """
+    Awaitable variant of a repository, used by the service layer.
+
+    Every method of the wrapped repository is exposed as a coroutine.
+    With an AsyncSession the call runs through `run_sync`, so its I/O goes
+    through the async driver and overlaps with other requests; with a
+    plain Session it runs in the threadpool instead of blocking the loop.
+    """
+
+    def __init__(self, db: Union[Session, AsyncSession], repository_cls: type[RepositoryType]):
+        self.db = db
+        self.repository_cls = repository_cls
+        self._sync_repository = None if isinstance(db, AsyncSession) else repository_cls(db)
+
+
+    def __getattr__(self, name: str):
+        if name.startswith("_") or not callable(getattr(self.repository_cls, name, None)):
+            raise AttributeError(f"{self.repository_cls.__name__} has no method '{name}'")
+
+        async def call(*args, **kwargs):
+            if self._sync_repository is not None:
+                return await run_in_threadpool(getattr(self._sync_repository, name), *args, **kwargs)
+
+            return await self.db.run_sync(
+                lambda session: getattr(self.repository_cls(session), name)(*args, **kwargs)
+            )
+
+        call.__name__ = name
+        return call
\ No newline at end of file
@@ -1,9 +1,11 @@
 from typing import Optional, List, Dict, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, update
 from datetime import datetime
+from uuid import UUID
 
-from app.api.repositories.base import BaseRepository
+from app.api.repositories.base import BaseRepository, AsyncRepository, replica_read
 from app.api.models.user import Role, UserProfile
 
 
@@ -16,21 +18,52 @@ class RoleRepository(BaseRepository[Role, dict, dict]):
         return self.db.query(Role).filter(Role.name == name).first()
 
 
-    def get_all_with_users_count(self) -> List[Dict[str, Any]]:
-        roles_with_counts = self.db.query(
-            Role,
-            func.count(UserProfile.id).label('users_count')
-        ).outerjoin(UserProfile).group_by(Role.id).order_by(Role.name).all()
+    def get_all_roles(self) -> List[Role]:
+        return self.db.query(Role).order_by(Role.name).all()
+
 
+    @replica_read
+    def get_all_with_users_count(self) -> List[Dict[str, Any]]:
         return [
             {
                 "role": role,
-                "users_count": count or 0
+                "users_count": role.users_count
             }
-            for role, count in roles_with_counts
+            for role in self.db.query(Role).order_by(Role.name).all()
         ]
 
 
+    @replica_read
+    def get_users_count(self, role_id: UUID) -> int:
+        return self.db.query(Role.users_count).filter(Role.id == role_id).scalar() or 0
+
+
+    def reconcile_users_count(self) -> List[Dict[str, Any]]:
+        """Recount users per role and correct every counter that drifted; returns the corrections"""
+        # Holding the role rows first means in-flight assignments apply their delta after the recount, not before
+        roles = self.db.query(Role).with_for_update().all()
+        actual = dict(
+            self.db.query(UserProfile.role_id, func.count(UserProfile.id))
+            .filter(UserProfile.role_id.isnot(None))
+            .group_by(UserProfile.role_id)
+            .all()
+        )
+
+        drift = []
+        for role in roles:
+            count = actual.get(role.id, 0)
+            if role.users_count != count:
+                drift.append({"role": role.name, "stored": role.users_count, "actual": count})
+                self.db.execute(
+                    update(Role)
+                    .where(Role.id == role.id)
+                    .values(users_count=count, updated_at=Role.updated_at)
+                )
+
+        self.db.commit()
+        return drift
+
+
     def initialize_default_roles(self):
         default_roles = [
             {
@@ -52,8 +85,14 @@ class RoleRepository(BaseRepository[Role, dict, dict]):
             }
         ]
 
+        existing_names = {
+            name for (name,) in self.db.query(Role.name).filter(
+                Role.name.in_([role_data["name"] for role_data in default_roles])
+            )
+        }
+
         for role_data in default_roles:
-            if not self.get_by_name(role_data["name"]):
+            if role_data["name"] not in existing_names:
                 db_role = Role(
                     name=role_data["name"],
                     description=role_data["description"],
@@ -62,4 +101,10 @@ class RoleRepository(BaseRepository[Role, dict, dict]):
                 )
                 self.db.add(db_role)
 
-        self.db.commit()
\ No newline at end of file
+        self.db.commit()
+
+
+
+class AsyncRoleRepository(AsyncRepository[RoleRepository]):
+    def __init__(self, db: Session | AsyncSession):
+        super().__init__(db, RoleRepository)
\ No newline at end of file
@@ -1,10 +1,12 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, func, update, values, column, text, String, DateTime
 from datetime import datetime, timedelta
 from uuid import UUID
 
-from app.api.repositories.base import BaseRepository
+from app.api.repositories.base import BaseRepository, AsyncRepository, replica_read, text_match, text_rank
+from app.core.database import trigram_available
 from app.api.models.user import UserProfile, Role
 from app.api.schemas.user import UpdateProfileRequest
 
@@ -15,6 +17,35 @@ class UserRepository(BaseRepository[UserProfile, dict, UpdateProfileRequest]):
         super().__init__(db, UserProfile)
 
 
+    def create(self, obj_in: dict) -> UserProfile:
+        db_obj = UserProfile(**obj_in)
+        self.db.add(db_obj)
+        self.db.flush()
+        self._adjust_role_counts({db_obj.role_id: 1})
+        self.db.commit()
+        self.db.refresh(db_obj)
+        return db_obj
+
+
+    def delete(self, id: Any) -> Optional[UserProfile]:
+        obj = self.db.query(UserProfile).filter(UserProfile.id == id).with_for_update().first()
+        if obj:
+            self._adjust_role_counts({obj.role_id: -1})
+            self.db.delete(obj)
+            self.db.commit()
+        return obj
+
+
+    def _adjust_role_counts(self, deltas: Dict[Optional[UUID], int]):
+        """Apply per-role users_count deltas in the caller's transaction; roles are locked in id order to avoid deadlocks"""
+        for role_id in sorted((role_id for role_id, delta in deltas.items() if role_id is not None and delta), key=str):
+            self.db.execute(
+                update(Role)
+                .where(Role.id == role_id)
+                .values(users_count=Role.users_count + deltas[role_id], updated_at=Role.updated_at)
+            )
+
+
     def get_by_supabase_id(self, supabase_user_id: str) -> Optional[UserProfile]:
         return self.db.query(UserProfile).filter(
             UserProfile.supabase_user_id == supabase_user_id
@@ -33,29 +64,37 @@ class UserRepository(BaseRepository[UserProfile, dict, UpdateProfileRequest]):
         ).filter(UserProfile.supabase_user_id == supabase_user_id).first()
 
 
+    def get_supabase_ids(self, user_ids: List[UUID]) -> List[str]:
+        rows = self.db.query(UserProfile.supabase_user_id).filter(
+            UserProfile.id.in_(user_ids)
+        ).all()
+        return [row.supabase_user_id for row in rows]
+
+
     def get_users_by_role(self, role_id: UUID) -> List[UserProfile]:
         return self.db.query(UserProfile).filter(
             UserProfile.role_id == role_id
         ).all()
 
 
+    @replica_read
     def search_users(
         self, 
         search_term: str,
         role_id: Optional[UUID] = None,
-        active_only: bool = True
+        active_only: bool = True,
+        limit: int = 20
     ) -> List[UserProfile]:
-        query = self.db.query(UserProfile).options(joinedload(UserProfile.role))
+        """Best matches on name or Supabase id first, typo-tolerant where pg_trgm is installed"""
+        if not search_term:
+            return []
         
-        search_conditions = []
-        if search_term:
-            search_conditions.extend([
-                UserProfile.full_name.like(f"%{search_term}%"),
-                UserProfile.supabase_user_id.like(f"%{search_term}%")
-            ])
+        columns = [UserProfile.full_name, UserProfile.supabase_user_id]
+        trigram = trigram_available(self.db.get_bind())
         
-        if search_conditions:
-            query = query.filter(or_(*search_conditions))
+        query = self.db.query(UserProfile).options(joinedload(UserProfile.role)).filter(
+            text_match(columns, search_term, fuzzy=trigram)
+        )
         
         if role_id:
             query = query.filter(UserProfile.role_id == role_id)
@@ -63,9 +102,12 @@ class UserRepository(BaseRepository[UserProfile, dict, UpdateProfileRequest]):
         if active_only and hasattr(UserProfile, 'is_active'):
             query = query.filter(UserProfile.is_active == True)
         
-        return query.all()
+        return query.order_by(
+            text_rank(columns, search_term, trigram), UserProfile.id
+        ).limit(limit).all()
 
 
+    @replica_read
     def get_users_paginated(
         self,
         skip: int = 0,
@@ -79,22 +121,13 @@ class UserRepository(BaseRepository[UserProfile, dict, UpdateProfileRequest]):
         query = self.db.query(UserProfile).options(joinedload(UserProfile.role))
         
         # Apply filters
-        filters = []
-        
-        if role_id:
-            filters.append(UserProfile.role_id == role_id)
-        
-        if search_term:
-            search_conditions = [
-                UserProfile.full_name.like(f"%{search_term}%")
-            ]
-            filters.append(or_(*search_conditions))
+        filters = self._user_filters(role_id, search_term)
         
         if filters:
             query = query.filter(and_(*filters))
         
-        # Count total records
-        total = query.count()
+        # Count total records, without the eager-loaded role join
+        total = self.db.query(func.count(UserProfile.id)).filter(*filters).scalar() or 0
         
         # Apply ordering
         if hasattr(UserProfile, order_by):
@@ -115,6 +148,89 @@ class UserRepository(BaseRepository[UserProfile, dict, UpdateProfileRequest]):
         }
 
 
+    @staticmethod
+    def _user_filters(role_id: Optional[UUID] = None, search_term: Optional[str] = None) -> list:
+        filters = []
+        if role_id:
+            filters.append(UserProfile.role_id == role_id)
+        if search_term:
+            filters.append(text_match([UserProfile.full_name, UserProfile.supabase_user_id], search_term))
+        return filters
+
+
+    @replica_read
+    def get_users_page(
+        self,
+        limit: int = 25,
+        sort: str = "created_at",
+        order_desc: bool = True,
+        after: Optional[Tuple[datetime, UUID]] = None,
+        role_id: Optional[UUID] = None,
+        search_term: Optional[str] = None
+    ) -> List[UserProfile]:
+        """
+        Keyset page ordered by (sort, id), starting after the given key.
+        Returns up to limit + 1 rows so callers can tell whether another page exists.
+        """
+        sort_column = UserProfile.updated_at if sort == "updated_at" else UserProfile.created_at
+        query = self.db.query(UserProfile).options(
+            joinedload(UserProfile.role)
+        ).filter(*self._user_filters(role_id, search_term))
+        
+        if after:
+            after_value, after_id = after
+            if order_desc:
+                query = query.filter(or_(
+                    sort_column < after_value,
+                    and_(sort_column == after_value, UserProfile.id < after_id)
+                ))
+            else:
+                query = query.filter(or_(
+                    sort_column > after_value,
+                    and_(sort_column == after_value, UserProfile.id > after_id)
+                ))
+        
+        if order_desc:
+            query = query.order_by(sort_column.desc(), UserProfile.id.desc())
+        else:
+            query = query.order_by(sort_column, UserProfile.id)
+        
+        return query.limit(limit + 1).all()
+
+
+    @replica_read
+    def count_users(
+        self,
+        role_id: Optional[UUID] = None,
+        search_term: Optional[str] = None,
+        exact: bool = False,
+        cap: int = 10000
+    ) -> Tuple[int, bool]:
+        """
+        Total for user listings, returned with an `is_estimate` flag.
+        Unless an exact count is requested, unfiltered totals come from the
+        planner statistics on PostgreSQL and filtered totals are counted
+        exactly up to `cap` rows.
+        """
+        filters = self._user_filters(role_id, search_term)
+        
+        if exact:
+            return self.db.query(func.count(UserProfile.id)).filter(*filters).scalar() or 0, False
+        
+        if not filters and self.db.get_bind().dialect.name == "postgresql":
+            estimate = self.db.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'user_profiles'::regclass")
+            ).scalar()
+            if estimate is not None and estimate >= 0:
+                return int(estimate), True
+        
+        capped = self.db.query(UserProfile.id).filter(*filters).limit(cap + 1).subquery()
+        count = self.db.query(func.count()).select_from(capped).scalar() or 0
+        if count > cap:
+            return cap, True
+        return count, False
+
+
     def update_last_activity(self, supabase_user_id: str) -> Optional[UserProfile]:
         user = self.get_by_supabase_id(supabase_user_id)
         if user:
@@ -125,6 +241,35 @@ class UserRepository(BaseRepository[UserProfile, dict, UpdateProfileRequest]):
         return user
 
 
+    def bulk_update_last_activity(self, last_seen: Dict[str, datetime], chunk_size: int = 1000) -> int:
+        """Apply buffered activity timestamps with one UPDATE ... FROM (VALUES ...) per chunk"""
+        items = list(last_seen.items())
+        updated_count = 0
+
+        for start in range(0, len(items), chunk_size):
+            activity = values(
+                column("supabase_user_id", String),
+                column("last_activity_at", DateTime(timezone=True)),
+                name="activity"
+            ).data(items[start:start + chunk_size])
+
+            result = self.db.execute(
+                update(UserProfile)
+                .where(UserProfile.supabase_user_id == activity.c.supabase_user_id)
+                .where(or_(
+                    UserProfile.last_activity_at.is_(None),
+                    UserProfile.last_activity_at < activity.c.last_activity_at
+                ))
+                .values(last_activity_at=activity.c.last_activity_at)
+                .execution_options(synchronize_session=False)
+            )
+            updated_count += result.rowcount
+
+        self.db.commit()
+        return updated_count
+
+
+    @replica_read
     def get_recent_users(self, days: int = 7, limit: int = 10) -> List[UserProfile]:
         since_date = datetime.utcnow() - timedelta(days=days)
         return self.db.query(UserProfile).options(
@@ -134,6 +279,7 @@ class UserRepository(BaseRepository[UserProfile, dict, UpdateProfileRequest]):
         ).order_by(UserProfile.created_at.desc()).limit(limit).all()
 
 
+    @replica_read
     def get_active_users_count(self, days: int = 30) -> int:
         since_date = datetime.utcnow() - timedelta(days=days)
         return self.db.query(UserProfile).filter(
@@ -141,6 +287,7 @@ class UserRepository(BaseRepository[UserProfile, dict, UpdateProfileRequest]):
         ).count()
 
 
+    @replica_read
     def get_users_by_role_name(self, role_name: str) -> List[UserProfile]:
         return self.db.query(UserProfile).options(
             joinedload(UserProfile.role)
@@ -148,8 +295,10 @@ class UserRepository(BaseRepository[UserProfile, dict, UpdateProfileRequest]):
 
 
     def update_user_role(self, user_id: UUID, role_id: UUID) -> Optional[UserProfile]:
-        user = self.get(user_id)
+        user = self.db.query(UserProfile).filter(UserProfile.id == user_id).with_for_update().first()
         if user:
+            if user.role_id != role_id:
+                self._adjust_role_counts({user.role_id: -1, role_id: 1})
             user.role_id = role_id
             user.updated_at = datetime.utcnow()
             self.db.add(user)
@@ -159,6 +308,17 @@ class UserRepository(BaseRepository[UserProfile, dict, UpdateProfileRequest]):
 
 
     def bulk_update_role(self, user_ids: List[UUID], role_id: UUID) -> int:
+        # Lock the affected profiles so their previous roles cannot change before the counters are moved
+        previous_roles = self.db.query(UserProfile.role_id).filter(
+            UserProfile.id.in_(user_ids)
+        ).with_for_update().all()
+        deltas: Dict[Optional[UUID], int] = {}
+        for (previous_role_id,) in previous_roles:
+            if previous_role_id != role_id:
+                deltas[previous_role_id] = deltas.get(previous_role_id, 0) - 1
+                deltas[role_id] = deltas.get(role_id, 0) + 1
+        self._adjust_role_counts(deltas)
+
         updated_count = self.db.query(UserProfile).filter(
             UserProfile.id.in_(user_ids)
         ).update({
@@ -170,30 +330,31 @@ class UserRepository(BaseRepository[UserProfile, dict, UpdateProfileRequest]):
         return updated_count
 
 
+    @replica_read
     def get_user_stats(self) -> Dict[str, Any]:
-        total_users = self.db.query(UserProfile).count()
-        
-        # Users by role
-        role_stats = self.db.query(
-            Role.name,
-            func.count(UserProfile.id).label('count')
-        ).outerjoin(UserProfile).group_by(Role.name).all()
-        
-        # Recent activity
+        """Totals, per-role counts, recent activity and new users in one aggregate statement"""
         last_7_days = datetime.utcnow() - timedelta(days=7)
-        recent_active = self.db.query(UserProfile).filter(
-            UserProfile.last_activity_at >= last_7_days
-        ).count()
-        
-        # New users this month
         this_month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        new_this_month = self.db.query(UserProfile).filter(
-            UserProfile.created_at >= this_month
-        ).count()
+        
+        # FULL JOIN keeps roles without users and users without a role in the same pass
+        rows = self.db.query(
+            Role.name,
+            func.count(UserProfile.id).label("total"),
+            func.count(UserProfile.id).filter(UserProfile.last_activity_at >= last_7_days).label("active"),
+            func.count(UserProfile.id).filter(UserProfile.created_at >= this_month).label("new")
+        ).select_from(Role).join(
+            UserProfile, UserProfile.role_id == Role.id, full=True
+        ).group_by(Role.name).all()
         
         return {
-            "total_users": total_users,
-            "users_by_role": {role: count for role, count in role_stats},
-            "active_last_7_days": recent_active,
-            "new_this_month": new_this_month
-        }
\ No newline at end of file
+            "total_users": sum(row.total for row in rows),
+            "users_by_role": {row.name: row.total for row in rows if row.name is not None},
+            "active_last_7_days": sum(row.active for row in rows),
+            "new_this_month": sum(row.new for row in rows)
+        }
+
+
+
+class AsyncUserRepository(AsyncRepository[UserRepository]):
+    def __init__(self, db: Session | AsyncSession):
+        super().__init__(db, UserRepository)
\ No newline at end of file
@@ -1,5 +1,8 @@
 from .user import UserProfile, UserProfileResponse, UpdateProfileRequest, RoleSchema
-from .activity_log import LogActivityRequest, LogActivityResponse, ActivityLogSchema
+from .activity_log import (
+    LogActivityRequest, LogActivityResponse, LogActivityBatchRequest, LogActivityBatchResponse,
+    ActivityLogSchema
+)
 from .admin import (
     AdminUserResponse, AdminUserDetailResponse, AdminUsersListResponse,
     AdminCreateUserRequest, AdminUpdateUserRequest,
@@ -1,7 +1,8 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 from uuid import UUID
+from app.config import settings
 
 
 
@@ -44,6 +45,38 @@ class LogActivityResponse(BaseModel):
         }
 
 
+class LogActivityBatchRequest(BaseModel):
+    events: List[LogActivityRequest] = Field(min_length=1, max_length=settings.ACTIVITY_BATCH_MAX_EVENTS)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "events": [
+                    {"activity_type": "navigation", "action": "page_view", "resource_type": "dashboard"},
+                    {"activity_type": "user_action", "action": "filter_applied", "metadata": {"filter": "status"}}
+                ]
+            }
+        }
+
+
+class LogActivityBatchResponse(BaseModel):
+    message: str
+    activity_ids: List[UUID]
+    logged_at: datetime
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "message": "2 activities logged successfully",
+                "activity_ids": [
+                    "123e4567-e89b-12d3-a456-426614174000",
+                    "123e4567-e89b-12d3-a456-426614174001"
+                ],
+                "logged_at": "2024-01-15T10:30:00Z"
+            }
+        }
+
+
 class ActivityLogSchema(BaseModel):
     id: UUID
     user_id: UUID
@@ -1,9 +1,35 @@
 from .user_service import UserProfileService
 from .role_service import RoleService
 from .activity_log_service import ActivityLogService
+from .last_activity_buffer import LastActivityBuffer, last_activity_buffer
+from .activity_ingestion import ActivityIngestionQueue, IngestionQueueFull, activity_ingestion
+from .activity_maintenance import ensure_activity_partitions, partition_maintenance
+from .role_maintenance import reconcile_role_user_counts, role_count_reconcile
+from .activity_retention import ActivityRetentionJob, RetentionJobRunning, activity_retention
+from .history_export import iter_activity_export
+from .activity_stream import activity_bus, notify_listener, stream_activity_events
+from .unique_users import UniqueUserSketches, unique_user_sketches
 
 __all__ = [
     "UserProfileService",
     "RoleService",
-    "ActivityLogService"
+    "ActivityLogService",
+    "LastActivityBuffer",
+    "last_activity_buffer",
+    "ActivityIngestionQueue",
+    "IngestionQueueFull",
+    "activity_ingestion",
+    "ensure_activity_partitions",
+    "partition_maintenance",
+    "reconcile_role_user_counts",
+    "role_count_reconcile",
+    "ActivityRetentionJob",
+    "RetentionJobRunning",
+    "activity_retention",
+    "iter_activity_export",
+    "activity_bus",
+    "notify_listener",
+    "stream_activity_events",
+    "UniqueUserSketches",
+    "unique_user_sketches"
 ]
\ No newline at end of file
@@ -0,0 +1,394 @@
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.core.serialization import json_default
+from app.core.background import PeriodicTask
+from app.core.database import SessionLocal
+from app.core.spool import Spool
+from app.api.repositories import ActivityLogRepository, UserRepository
+from app.api.services.last_activity_buffer import last_activity_buffer
+from app.api.services.activity_stream import activity_event, notify_payloads, publish_activities
+from app.api.services.unique_users import unique_user_sketches
+
+
+class IngestionQueueFull(Exception):
+    """Raised when the ingestion queue cannot accept more events"""
+
+
+def _encode_event(row: Dict[str, Any], supabase_user_id: str) -> bytes:
+    return json.dumps({"row": row, "supabase_user_id": supabase_user_id}, default=json_default).encode("utf-8")
+
+
+def _decode_event(record: bytes) -> Tuple[Dict[str, Any], str]:
+    event = json.loads(record)
+    row = event["row"]
+    for key in ("id", "user_id", "resource_id"):
+        if row.get(key) is not None:
+            row[key] = UUID(row[key])
+    row["created_at"] = datetime.fromisoformat(row["created_at"])
+    return row, event["supabase_user_id"]
+
+
+def _repeat_update(row: Dict[str, Any], repeats: Dict[str, Any]) -> Dict[str, Any]:
+    return {"id": row["id"], "created_at": row["created_at"], "metadata": repeats}
+
+
+class ActivityIngestionQueue:
+    """
+    In-process pipeline for activity events.
+
+    Request handlers enqueue fully built rows (with pre-generated ids) and
+    return immediately; a background writer drains the bounded queue and
+    persists events in batches with a single multi-row INSERT. A full
+    queue is reported to the caller instead of growing memory.
+
+    With a spool configured, a failed or slow database write diverts the
+    writer to the local spool for a cooldown period, so the queue keeps
+    draining at disk speed; a periodic replayer re-inserts spooled events
+    once the database is healthy again.
+
+    Coalesced activity types queue the first event of a window right away,
+    so it is as durable as any other; repeats only bump an in-memory count
+    that is queued as a metadata update once the window closes. Queue and
+    spool entries with no supabase_user_id are such updates.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        batch_size: int,
+        flush_interval: float,
+        spool: Optional[Spool] = None,
+        slow_write_seconds: float = 0,
+        spool_cooldown: float = 0,
+        replay_interval: float = 0,
+        coalesce_windows: Optional[Dict[str, float]] = None
+    ):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spool = spool
+        self.slow_write_seconds = slow_write_seconds
+        self.spool_cooldown = spool_cooldown
+        self._queue: "asyncio.Queue[Tuple[Dict[str, Any], str]]" = asyncio.Queue(maxsize=max(max_size, 1))
+        self._writer: Optional[asyncio.Task] = None
+        self._divert_until = 0.0
+        self._replayer = PeriodicTask("activity spool replay", replay_interval if spool else 0, self.replay_spool)
+        self.coalesce_windows = {activity_type: window for activity_type, window in (coalesce_windows or {}).items() if window > 0}
+        self._coalescing: Dict[Tuple, Tuple[Dict[str, Any], Optional[Dict[str, Any]], float]] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.spooled = 0
+        self.replayed = 0
+        self.coalesced = 0
+
+
+    @property
+    def running(self) -> bool:
+        return self._writer is not None and not self._writer.done()
+
+
+    @property
+    def diverting(self) -> bool:
+        return self.spool is not None and time.monotonic() < self._divert_until
+
+
+    def submit(self, row: Dict[str, Any], supabase_user_id: str) -> Dict[str, Any]:
+        """Enqueue a row; returns the row that will be persisted, which differs when the event was coalesced"""
+        window = self.coalesce_windows.get(row["activity_type"])
+        if window is None:
+            try:
+                self._queue.put_nowait((row, supabase_user_id))
+            except asyncio.QueueFull:
+                raise IngestionQueueFull()
+            return row
+
+        key = (row["user_id"], row["activity_type"], row["action"], row["resource_type"], row["resource_id"])
+        entry = self._coalescing.get(key)
+        if entry is not None:
+            first_row, repeats, closes_at = entry
+            repeats = {
+                "repeat_count": (repeats or {}).get("repeat_count", 1) + 1,
+                "last_repeat_at": row["created_at"].isoformat()
+            }
+            self._coalescing[key] = (first_row, repeats, closes_at)
+            self.coalesced += 1
+            return {**first_row, "activity_metadata": {**(first_row["activity_metadata"] or {}), **repeats}}
+
+        if len(self._coalescing) >= self.max_size:
+            raise IngestionQueueFull()
+
+        try:
+            self._queue.put_nowait((row, supabase_user_id))
+        except asyncio.QueueFull:
+            raise IngestionQueueFull()
+        self._coalescing[key] = (row, None, asyncio.get_running_loop().time() + window)
+        return row
+
+
+    def start(self):
+        if self.max_size > 0 and not self.running:
+            self._writer = asyncio.create_task(self._run(), name="activity ingestion writer")
+            if self.coalesce_windows:
+                self._sweeper = asyncio.create_task(self._sweep(), name="activity coalescing sweeper")
+            self._replayer.start()
+
+
+    async def stop(self):
+        """Drain every queued event, then stop the writer"""
+        await self._replayer.stop()
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+        if not self.running:
+            await self._spool_unwritten()
+            return
+        await self._release_coalesced(force=True)
+        await self._queue.join()
+        self._writer.cancel()
+        try:
+            await self._writer
+        except asyncio.CancelledError:
+            pass
+        self._writer = None
+
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize(),
+            "max_size": self.max_size,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+            "coalescing": len(self._coalescing),
+            "coalesced": self.coalesced,
+            "spool": {
+                "enabled": self.spool is not None,
+                "diverting": self.diverting,
+                "spooled": self.spooled,
+                "replayed": self.replayed,
+                "pending_bytes": self.spool.pending_bytes() if self.spool else 0
+            }
+        }
+
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._flush(batch)
+
+
+    async def _sweep(self):
+        interval = min(max(min(self.coalesce_windows.values()) / 4, 0.1), 1.0)
+        while True:
+            await asyncio.sleep(interval)
+            await self._release_coalesced()
+
+
+    async def _release_coalesced(self, force: bool = False):
+        """Close expired windows, queueing the repeat count of each one that saw repeats"""
+        now = asyncio.get_running_loop().time()
+        expired = [key for key, (_, _, closes_at) in self._coalescing.items() if force or closes_at <= now]
+        for key in expired:
+            row, repeats, _ = self._coalescing.pop(key)
+            if repeats is None:
+                continue
+            update = (_repeat_update(row, repeats), None)
+            if force:
+                await self._queue.put(update)
+                continue
+            try:
+                self._queue.put_nowait(update)
+            except asyncio.QueueFull:
+                # Keep it open (and still absorbing repeats) until the writer catches up
+                self._coalescing[key] = (row, repeats, now)
+                break
+
+
+    async def _spool_unwritten(self):
+        """Without a running writer, spool whatever is still queued or held rather than dropping it"""
+        pending = []
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+            self._queue.task_done()
+        pending.extend(
+            (_repeat_update(row, repeats), None)
+            for row, repeats, _ in self._coalescing.values()
+            if repeats is not None
+        )
+        self._coalescing.clear()
+        if not pending:
+            return
+        if self.spool is None:
+            print(f"⚠️ Dropped {len(pending)} unwritten activity events: the writer is not running and no spool is configured")
+            return
+        await run_in_threadpool(self._spool_batch, pending)
+
+
+    async def _flush(self, batch: List[Tuple[Dict[str, Any], str]]):
+        try:
+            if self.diverting:
+                await run_in_threadpool(self._spool_batch, batch)
+                return
+
+            started = time.perf_counter()
+            try:
+                unmatched = await run_in_threadpool(self._write_batch, batch)
+            except Exception as e:
+                if self.spool is None:
+                    raise
+                print(f"⚠️ Error writing {len(batch)} activity events, spooling locally: {e}")
+                self._divert()
+                await run_in_threadpool(self._spool_batch, batch)
+                return
+
+            self.written += len(batch)
+            self.batches += 1
+            if unmatched and self.spool is not None:
+                # Their row was spooled earlier and is not replayed yet; the replay applies them after it
+                await run_in_threadpool(self._spool_batch, [(row, None) for row in unmatched])
+            if self.spool is not None and time.perf_counter() - started > self.slow_write_seconds:
+                print(f"⚠️ Activity write took {time.perf_counter() - started:.2f}s, spooling locally")
+                self._divert()
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"⚠️ Error writing {len(batch)} activity events: {e}")
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+
+    def _divert(self):
+        self._divert_until = time.monotonic() + self.spool_cooldown
+
+
+    def _spool_batch(self, batch: List[Tuple[Dict[str, Any], str]]):
+        self.spool.append([_encode_event(row, supabase_user_id) for row, supabase_user_id in batch])
+        self.spooled += len(batch)
+
+
+    def replay_spool(self) -> int:
+        """Re-insert spooled events in bulk; safe to repeat after a crash since existing ids are skipped"""
+        if self.spool is None or self.diverting:
+            return 0
+
+        claimed_path = self.spool.claim()
+        if claimed_path is None:
+            return 0
+
+        replayed = 0
+        orphaned = 0
+        batch = []
+        try:
+            for record in Spool.read(claimed_path):
+                batch.append(_decode_event(record))
+                if len(batch) >= self.batch_size:
+                    orphaned += len(self._write_batch(batch, skip_existing=True))
+                    replayed += len(batch)
+                    batch = []
+            if batch:
+                orphaned += len(self._write_batch(batch, skip_existing=True))
+                replayed += len(batch)
+        except Exception:
+            self._divert()
+            raise
+        finally:
+            self.replayed += replayed
+
+        if Spool.valid_length(claimed_path) < os.path.getsize(claimed_path):
+            # Records behind a corrupt frame cannot be read back; keep them for manual recovery
+            quarantined_path = self.spool.quarantine(claimed_path)
+            print(f"⚠️ Spool {claimed_path} has unreadable records after {replayed} events, moved to {quarantined_path}")
+        else:
+            self.spool.release(claimed_path)
+        if orphaned:
+            print(f"⚠️ Dropped {orphaned} spooled repeat counts whose activity row no longer exists")
+        if replayed:
+            print(f"✅ Replayed {replayed} spooled activity events")
+        return replayed
+
+
+    def _write_batch(self, batch: List[Tuple[Dict[str, Any], str]], skip_existing: bool = False) -> List[Dict[str, Any]]:
+        """Insert the batch's events, then apply its repeat updates; returns the updates whose row was not found"""
+        rows = [row for row, supabase_user_id in batch if supabase_user_id is not None]
+        repeats = [row for row, supabase_user_id in batch if supabase_user_id is None]
+        last_seen = {}
+        for row, supabase_user_id in batch:
+            if supabase_user_id is None:
+                continue
+            at = row["created_at"]
+            if supabase_user_id not in last_seen or at > last_seen[supabase_user_id]:
+                last_seen[supabase_user_id] = at
+
+        db = SessionLocal()
+        try:
+            activity_repo = ActivityLogRepository(db)
+            # A replay may skip rows that were already written; only new ones are announced
+            rows = activity_repo.bulk_create_activity_logs(rows, skip_existing=skip_existing)
+            if settings.ACTIVITY_STREAM_NOTIFY:
+                # After the insert has committed, so a failed NOTIFY can never undo or spool the batch
+                try:
+                    activity_repo.notify_activities(
+                        settings.ACTIVITY_STREAM_CHANNEL,
+                        notify_payloads([activity_event(row) for row in rows]),
+                        commit=True
+                    )
+                except Exception as e:
+                    print(f"⚠️ Error notifying other workers of {len(rows)} activity events: {e}")
+            unique_user_sketches.add(rows)
+            publish_activities(rows)
+            if last_activity_buffer.enabled:
+                for supabase_user_id, at in last_seen.items():
+                    last_activity_buffer.touch(supabase_user_id, at)
+            else:
+                UserRepository(db).bulk_update_last_activity(last_seen)
+            return activity_repo.merge_activity_metadata(repeats) if repeats else []
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+activity_ingestion = ActivityIngestionQueue(
+    settings.ACTIVITY_INGEST_QUEUE_SIZE,
+    settings.ACTIVITY_INGEST_BATCH_SIZE,
+    settings.ACTIVITY_INGEST_FLUSH_SECONDS,
+    spool=Spool(settings.ACTIVITY_SPOOL_PATH) if settings.ACTIVITY_SPOOL_PATH else None,
+    slow_write_seconds=settings.ACTIVITY_SPOOL_SLOW_WRITE_SECONDS,
+    spool_cooldown=settings.ACTIVITY_SPOOL_COOLDOWN_SECONDS,
+    replay_interval=settings.ACTIVITY_SPOOL_REPLAY_SECONDS,
+    coalesce_windows=settings.ACTIVITY_COALESCE_WINDOWS
+)
\ No newline at end of file
@@ -1,20 +1,35 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List, Dict, Any
-from uuid import UUID
-from datetime import datetime
+from uuid import UUID, uuid4
+from datetime import datetime, date, time, timedelta
 
 from app.api.models.activity_log import ActivityLog
-from app.api.repositories import ActivityLogRepository, UserRepository
+from app.api.repositories import (
+    AsyncActivityLogRepository, AsyncActivityRollupRepository, AsyncActivityUserSketchRepository,
+    AsyncUserRepository, encode_cursor, decode_cursor
+)
 from app.api.schemas.activity_log import LogActivityRequest
+from app.api.services.last_activity_buffer import last_activity_buffer
+from app.api.services.activity_ingestion import activity_ingestion, IngestionQueueFull
+from app.api.services.activity_retention import activity_retention, RetentionJobRunning
+from app.api.services.activity_stream import activity_event, notify_payloads, publish_activities
+from app.api.services.unique_users import unique_user_sketches
+from app.core.principals import Principal
+from app.core.hyperloglog import standard_error
+from app.config import settings
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
 
 
 
 class ActivityLogService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session | AsyncSession):
         self.db = db
-        self.activity_repo = ActivityLogRepository(db)
-        self.user_repo = UserRepository(db)
+        self.activity_repo = AsyncActivityLogRepository(db)
+        self.rollup_repo = AsyncActivityRollupRepository(db)
+        self.sketch_repo = AsyncActivityUserSketchRepository(db)
+        self.user_repo = AsyncUserRepository(db)
 
 
     async def log_activity(
@@ -24,11 +39,11 @@ class ActivityLogService:
         ip_address: str = None,
         user_agent: str = None
     ) -> ActivityLog:
-        user_profile = self.user_repo.get_by_supabase_id(supabase_user_id)
+        user_profile = await self.user_repo.get_by_supabase_id(supabase_user_id)
         if not user_profile:
             raise HTTPException(status_code=404, detail="User profile not found")
         
-        activity_log = self.activity_repo.create_activity_log(
+        activity_log = await self.activity_repo.create_activity_log(
             user_id=user_profile.id,
             activity_type=activity_data.activity_type,
             action=activity_data.action,
@@ -40,11 +55,96 @@ class ActivityLogService:
             user_agent=user_agent
         )
         
-        self.user_repo.update_last_activity(supabase_user_id)
+        await last_activity_buffer.record(self.user_repo, supabase_user_id)
+        await self._announce([
+            {column.key: getattr(activity_log, column.key) for column in ActivityLog.__table__.columns}
+        ])
         
         return activity_log
 
 
+    async def ingest_activity(
+        self,
+        principal: Principal,
+        activity_data: LogActivityRequest,
+        ip_address: str = None,
+        user_agent: str = None
+    ) -> Dict[str, Any]:
+        """Queue the activity for the background writer and return the row it will insert (or was merged into)"""
+        row = self._build_activity_row(principal.profile_id, activity_data, ip_address, user_agent)
+
+        try:
+            row = activity_ingestion.submit(row, principal.id)
+        except IngestionQueueFull:
+            raise HTTPException(
+                status_code=429,
+                detail="Activity ingestion is saturated, retry later",
+                headers={"Retry-After": "1"}
+            )
+
+        return row
+
+
+    async def log_activities(
+        self,
+        principal: Principal,
+        activities: List[LogActivityRequest],
+        ip_address: str = None,
+        user_agent: str = None
+    ) -> List[Dict[str, Any]]:
+        """Insert a batch of activities for one user with a single statement"""
+        logged_at = datetime.utcnow()
+        rows = [
+            self._build_activity_row(principal.profile_id, activity_data, ip_address, user_agent, logged_at)
+            for activity_data in activities
+        ]
+
+        await self.activity_repo.bulk_create_activity_logs(rows)
+        await last_activity_buffer.record(self.user_repo, principal.id)
+        await self._announce(rows)
+
+        return rows
+
+
+    async def _announce(self, rows: List[Dict[str, Any]]):
+        """Feed rows written synchronously to the unique-user sketches and stream subscribers, here and on other workers"""
+        unique_user_sketches.add(rows)
+        publish_activities(rows)
+        if settings.ACTIVITY_STREAM_NOTIFY:
+            # The rows are already committed; other workers' streams missing them must not fail the request
+            try:
+                await self.activity_repo.notify_activities(
+                    settings.ACTIVITY_STREAM_CHANNEL,
+                    notify_payloads([activity_event(row) for row in rows]),
+                    commit=True
+                )
+            except Exception as e:
+                print(f"⚠️ Error notifying other workers of {len(rows)} activity events: {e}")
+
+
+    def _build_activity_row(
+        self,
+        user_id: UUID,
+        activity_data: LogActivityRequest,
+        ip_address: str = None,
+        user_agent: str = None,
+        created_at: datetime = None
+    ) -> Dict[str, Any]:
+        return {
+            "id": uuid4(),
+            "user_id": user_id,
+            "activity_type": activity_data.activity_type,
+            "action": activity_data.action,
+            "description": activity_data.description,
+            "resource_type": activity_data.resource_type,
+            "resource_id": activity_data.resource_id,
+            "activity_metadata": activity_data.metadata,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "created_at": created_at or datetime.utcnow()
+        }
+
+
     async def get_user_activities(
         self,
         supabase_user_id: str,
@@ -54,11 +154,11 @@ class ActivityLogService:
         days_back: int = None
     ) -> List[ActivityLog]:
         
-        user_profile = self.user_repo.get_by_supabase_id(supabase_user_id)
+        user_profile = await self.user_repo.get_by_supabase_id(supabase_user_id)
         if not user_profile:
             raise HTTPException(status_code=404, detail="User profile not found")
         
-        return self.activity_repo.get_user_activities(
+        return await self.activity_repo.get_user_activities(
             user_id=user_profile.id,
             limit=limit,
             offset=offset,
@@ -72,12 +172,53 @@ class ActivityLogService:
         limit: int = 100,
         activity_types: List[str] = None
     ) -> List[ActivityLog]:
-        return self.activity_repo.get_recent_activities(
+        return await self.activity_repo.get_recent_activities(
             limit=limit,
             activity_types=activity_types
         )
 
 
+    async def get_activity_logs_page(
+        self,
+        limit: int = 50,
+        cursor: str = None,
+        user_id: UUID = None,
+        activity_type: str = None,
+        resource_type: str = None,
+        include_total: bool = False
+    ) -> Dict[str, Any]:
+        after = None
+        if cursor:
+            try:
+                created_at, activity_id = decode_cursor(cursor)
+                after = (datetime.fromisoformat(created_at), UUID(activity_id))
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+        
+        filters = {
+            "user_id": user_id,
+            "activity_type": activity_type,
+            "resource_type": resource_type
+        }
+        activities = await self.activity_repo.get_activities_page(limit=limit, after=after, **filters)
+        
+        has_more = len(activities) > limit
+        activities = activities[:limit]
+        
+        page = {
+            "activities": activities,
+            "has_more": has_more,
+            "next_cursor": encode_cursor(activities[-1].created_at, activities[-1].id) if has_more else None
+        }
+        
+        if include_total:
+            total, is_estimate = await self.activity_repo.estimate_activities_count(**filters)
+            page["total"] = total
+            page["total_is_estimate"] = is_estimate
+        
+        return page
+
+
     async def get_activity_stats(
         self,
         supabase_user_id: str = None,
@@ -86,15 +227,92 @@ class ActivityLogService:
         
         user_id = None
         if supabase_user_id:
-            user_profile = self.user_repo.get_by_supabase_id(supabase_user_id)
+            user_profile = await self.user_repo.get_by_supabase_id(supabase_user_id)
             if user_profile:
                 user_id = user_profile.id
         
-        return self.activity_repo.get_activity_stats(
+        # Whole UTC days, today included, so every field covers exactly the days the sketches do
+        end = datetime.utcnow().date()
+        start = end - timedelta(days=days_back - 1)
+        
+        sketches = None
+        if unique_user_sketches.enabled and user_id is None:
+            sketches = await self.sketch_repo.get_days(start, end)
+            if not unique_user_sketches.covers(sketches, start, end):
+                # Days from before sketches were enabled (and never rebuilt) have none; count exactly instead
+                sketches = None
+        
+        stats_repo = self.rollup_repo if settings.ACTIVITY_ROLLUPS_ENABLED else self.activity_repo
+        stats = await stats_repo.get_activity_stats(
             user_id=user_id,
-            days_back=days_back
+            days_back=days_back,
+            count_unique_users=sketches is None,
+            since=datetime.combine(start, time.min)
+        )
+        
+        if sketches is not None:
+            stats["unique_users"] = await run_in_threadpool(unique_user_sketches.estimate, sketches, start, end)
+            stats["unique_users_is_estimate"] = True
+            stats["unique_users_relative_error"] = round(standard_error(), 4)
+        
+        return stats
+
+
+    async def get_unique_users_series(self, granularity: str = "day", periods: int = 30) -> List[Dict[str, Any]]:
+        """Approximate distinct users per day, ISO week or calendar month, most recent period last"""
+        if not unique_user_sketches.enabled:
+            raise HTTPException(status_code=503, detail="Unique user sketches are disabled")
+        
+        today = datetime.utcnow().date()
+        ranges = []
+        for offset in range(periods):
+            if granularity == "week":
+                start = today - timedelta(days=today.weekday()) - timedelta(weeks=offset)
+                end = start + timedelta(days=6)
+            elif granularity == "month":
+                month_index = today.year * 12 + today.month - 1 - offset
+                start = date(month_index // 12, month_index % 12 + 1, 1)
+                end = date((month_index + 1) // 12, (month_index + 1) % 12 + 1, 1) - timedelta(days=1)
+            else:
+                start = end = today - timedelta(days=offset)
+            ranges.append((start, min(end, today)))
+        ranges.reverse()
+        
+        sketches = await self.sketch_repo.get_days(ranges[0][0], today)
+
+        def estimate_ranges() -> List[Dict[str, Any]]:
+            return [
+                {
+                    "period_start": start,
+                    "period_end": end,
+                    "unique_users": unique_user_sketches.estimate(sketches, start, end)
+                }
+                for start, end in ranges
+            ]
+
+        return await run_in_threadpool(estimate_ranges)
+
+
+    async def get_activity_trend(
+        self,
+        days_back: int = 7,
+        granularity: str = "hour",
+        activity_type: str = None
+    ) -> List[Dict[str, Any]]:
+        if not settings.ACTIVITY_ROLLUPS_ENABLED:
+            raise HTTPException(status_code=503, detail="Activity rollups are disabled")
+        
+        return await self.rollup_repo.get_activity_trend(
+            days_back=days_back,
+            granularity=granularity,
+            activity_type=activity_type
         )
 
 
     async def cleanup_old_logs(self, days_to_keep: int = 90) -> int:
-        return self.activity_repo.cleanup_old_logs(days_to_keep)
\ No newline at end of file
+        """Run the chunked retention job to completion and return how many rows it removed"""
+        try:
+            status = await run_in_threadpool(activity_retention.run, days_to_keep, settings.ACTIVITY_ARCHIVE_ENABLED)
+        except RetentionJobRunning:
+            raise HTTPException(status_code=409, detail="A retention run is already in progress")
+        return status["deleted"]
\ No newline at end of file
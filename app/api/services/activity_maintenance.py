@@ -0,0 +1,28 @@
+from typing import List
+
+from app.config import settings
+from app.core.background import PeriodicTask
+from app.core.database import SessionLocal
+from app.api.repositories import ActivityLogRepository
+
+
+def ensure_activity_partitions() -> List[str]:
+    """Create the current and upcoming monthly activity_logs partitions"""
+    if not settings.ACTIVITY_LOG_PARTITIONING:
+        return []
+
+    db = SessionLocal()
+    try:
+        return ActivityLogRepository(db).ensure_partitions(settings.ACTIVITY_LOG_PARTITION_MONTHS_AHEAD)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+partition_maintenance = PeriodicTask(
+    "activity_logs partition maintenance",
+    settings.ACTIVITY_LOG_MAINTENANCE_SECONDS if settings.ACTIVITY_LOG_PARTITIONING else 0,
+    ensure_activity_partitions
+)
\ No newline at end of file
@@ -0,0 +1,214 @@
+import asyncio
+import gzip
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.core.serialization import json_default
+from app.core.background import PeriodicTask
+from app.core.database import SessionLocal
+from app.api.repositories import ActivityLogRepository
+
+
+class RetentionJobRunning(Exception):
+    """Raised when a retention run is requested while another one is in progress"""
+
+
+class ActivityRetentionJob:
+    """
+    Chunked retention for activity_logs.
+
+    Rows older than the retention window are removed oldest first in
+    batches of `batch_size`; each batch is its own transaction followed by
+    a short sleep, so no statement holds locks for long and an interrupted
+    run simply resumes on the next one. With archiving on, every batch is
+    written to a gzip NDJSON file before it is deleted.
+    """
+
+    def __init__(self, batch_size: int, batch_sleep: float, archive_dir: str, interval: float):
+        self.batch_size = batch_size
+        self.batch_sleep = batch_sleep
+        self.archive_dir = archive_dir
+        self._run_lock = threading.Lock()
+        self._status_lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._status: Dict[str, Any] = {"state": "idle"}
+        self._schedule = PeriodicTask("activity retention", interval, self.run_scheduled)
+
+
+    @property
+    def running(self) -> bool:
+        return self._run_lock.locked()
+
+
+    def status(self) -> Dict[str, Any]:
+        with self._status_lock:
+            return dict(self._status)
+
+
+    def start(self, days_to_keep: int, archive: bool) -> Dict[str, Any]:
+        """Launch a run in the background and return its initial status"""
+        cutoff, started = self._begin(days_to_keep, archive)
+        self._task = asyncio.create_task(
+            run_in_threadpool(self._execute, cutoff, archive, started),
+            name="activity retention run"
+        )
+        return self.status()
+
+
+    def cancel(self) -> bool:
+        """Ask the current run to stop after its batch in progress"""
+        if not self.running:
+            return False
+        self._cancel.set()
+        return True
+
+
+    def start_schedule(self):
+        self._schedule.start()
+
+
+    async def stop(self):
+        self._cancel.set()
+        await self._schedule.stop()
+        if self._task is not None:
+            try:
+                await self._task
+            except Exception:
+                pass
+            self._task = None
+
+
+    def run_scheduled(self):
+        try:
+            self.run(settings.ACTIVITY_RETENTION_DAYS, settings.ACTIVITY_ARCHIVE_ENABLED)
+        except RetentionJobRunning:
+            pass
+
+
+    def run(self, days_to_keep: int, archive: bool) -> Dict[str, Any]:
+        cutoff, started = self._begin(days_to_keep, archive)
+        return self._execute(cutoff, archive, started)
+
+
+    def _begin(self, days_to_keep: int, archive: bool) -> Tuple[datetime, float]:
+        """Take the run lock and publish the running status; the lock is released by _execute"""
+        if not self._run_lock.acquire(blocking=False):
+            raise RetentionJobRunning()
+
+        self._cancel.clear()
+        cutoff = datetime.utcnow() - timedelta(days=days_to_keep)
+        started = time.monotonic()
+        self._set_status(
+            state="running",
+            cutoff=cutoff,
+            archive=archive,
+            started_at=datetime.utcnow(),
+            finished_at=None,
+            batches=0,
+            deleted=0,
+            archived=0,
+            archive_files=0,
+            partitions_dropped=[],
+            rows_per_second=0.0,
+            error=None
+        )
+        return cutoff, started
+
+
+    def _execute(self, cutoff: datetime, archive: bool, started: float) -> Dict[str, Any]:
+        db = SessionLocal()
+        try:
+            repo = ActivityLogRepository(db)
+
+            # Without an archive whole partitions can go at once; the batches only cover the boundary month
+            if settings.ACTIVITY_LOG_PARTITIONING and not archive:
+                self._drop_partitions(repo, cutoff)
+
+            after = None
+            while not self._cancel.is_set():
+                rows = repo.get_expired_batch(cutoff, self.batch_size, after=after)
+                if not rows:
+                    break
+
+                if archive:
+                    self._archive(rows)
+                deleted = repo.delete_activity_logs([row["id"] for row in rows], cutoff)
+                after = (rows[-1]["created_at"], rows[-1]["id"])
+
+                with self._status_lock:
+                    self._status["batches"] += 1
+                    self._status["deleted"] += deleted
+                    if archive:
+                        self._status["archived"] += len(rows)
+                        self._status["archive_files"] += 1
+                    self._status["rows_per_second"] = round(
+                        self._status["deleted"] / max(time.monotonic() - started, 1e-6), 1
+                    )
+
+                if len(rows) < self.batch_size:
+                    break
+                self._cancel.wait(self.batch_sleep)
+
+            if settings.ACTIVITY_LOG_PARTITIONING and archive and not self._cancel.is_set():
+                self._drop_partitions(repo, cutoff)
+
+            self._set_status(state="cancelled" if self._cancel.is_set() else "completed")
+        except Exception as e:
+            db.rollback()
+            self._set_status(state="failed", error=str(e))
+            print(f"⚠️ Activity retention failed: {e}")
+            raise
+        finally:
+            db.close()
+            self._set_status(finished_at=datetime.utcnow())
+            self._run_lock.release()
+
+        return self.status()
+
+
+    def _drop_partitions(self, repo: ActivityLogRepository, cutoff: datetime):
+        dropped = repo.drop_partitions_before(cutoff)
+        with self._status_lock:
+            self._status["partitions_dropped"] += list(dropped)
+            self._status["deleted"] += sum(dropped.values())
+
+
+    def _archive(self, rows: List[Dict[str, Any]]) -> str:
+        """Write one batch to its own file; the name is derived from the first row so a retried batch overwrites it"""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        first = rows[0]
+        name = f"activity_logs_{first['created_at']:%Y%m%dT%H%M%S%f}_{first['id']}.ndjson.gz"
+        path = os.path.join(self.archive_dir, name)
+        partial = f"{path}.partial"
+
+        with open(partial, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb") as archive_file:
+                for row in rows:
+                    archive_file.write(json.dumps(row, default=json_default).encode("utf-8"))
+                    archive_file.write(b"\n")
+            raw.flush()
+            os.fsync(raw.fileno())
+
+        os.replace(partial, path)
+        return path
+
+
+    def _set_status(self, **values):
+        with self._status_lock:
+            self._status.update(values)
+
+
+activity_retention = ActivityRetentionJob(
+    settings.ACTIVITY_RETENTION_BATCH_SIZE,
+    settings.ACTIVITY_RETENTION_BATCH_SLEEP_SECONDS,
+    settings.ACTIVITY_ARCHIVE_DIR,
+    settings.ACTIVITY_RETENTION_INTERVAL_SECONDS
+)
\ No newline at end of file
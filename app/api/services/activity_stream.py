@@ -0,0 +1,179 @@
+import json
+import select
+import threading
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+from uuid import UUID
+
+from app.config import settings
+from app.core.database import engine
+from app.core.event_bus import EventBus, WORKER_ID
+
+
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more
+NOTIFY_PAYLOAD_LIMIT = 7900
+# Room left for the {"origin":...,"events":[...]} envelope
+NOTIFY_EVENT_LIMIT = NOTIFY_PAYLOAD_LIMIT - 64
+
+
+def activity_event(row: Dict[str, Any]) -> Dict[str, Any]:
+    """The public, JSON-ready shape of a persisted activity row"""
+    return {
+        "id": str(row["id"]),
+        "user_id": str(row["user_id"]),
+        "activity_type": row["activity_type"],
+        "action": row["action"],
+        "description": row.get("description"),
+        "resource_type": row.get("resource_type"),
+        "resource_id": str(row["resource_id"]) if row.get("resource_id") else None,
+        "timestamp": row["created_at"].isoformat() if isinstance(row["created_at"], datetime) else row["created_at"]
+    }
+
+
+def _encode_for_notify(event: Dict[str, Any]) -> str:
+    """Encode one event so it fits a payload on its own: drop the description, then all but its identity"""
+    encoded = json.dumps(event)
+    if len(encoded) <= NOTIFY_EVENT_LIMIT:
+        return encoded
+
+    encoded = json.dumps({**event, "description": None, "truncated": True})
+    if len(encoded) <= NOTIFY_EVENT_LIMIT:
+        return encoded
+
+    return json.dumps({
+        "id": event["id"],
+        "user_id": event["user_id"],
+        "timestamp": event["timestamp"],
+        "truncated": True
+    })
+
+
+def notify_payloads(events: List[Dict[str, Any]]) -> List[str]:
+    """Pack events into as few NOTIFY payloads as fit under the size limit"""
+    payloads = []
+    chunk: List[str] = []
+    size = 0
+    for event in events:
+        encoded = _encode_for_notify(event)
+        if chunk and size + len(encoded) + 64 > NOTIFY_PAYLOAD_LIMIT:
+            payloads.append(f'{{"origin":"{WORKER_ID}","events":[{",".join(chunk)}]}}')
+            chunk, size = [], 0
+        chunk.append(encoded)
+        size += len(encoded) + 1
+    if chunk:
+        payloads.append(f'{{"origin":"{WORKER_ID}","events":[{",".join(chunk)}]}}')
+    return payloads
+
+
+def publish_activities(rows: List[Dict[str, Any]]):
+    """Fan persisted rows out to local subscribers; callable from any thread"""
+    if rows:
+        activity_bus.publish_threadsafe([activity_event(row) for row in rows])
+
+
+class NotifyListener:
+    """
+    Bridges activity events across workers: a dedicated connection LISTENs
+    on the channel and republishes other workers' events on the local bus.
+    Runs on its own thread and reconnects after failures.
+    """
+
+    def __init__(self, bus: EventBus, channel: str, reconnect_delay: float = 5.0):
+        self.bus = bus
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.connected = False
+        self.received = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="activity notify listener", daemon=True)
+            self._thread.start()
+
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.reconnect_delay)
+            self._thread = None
+
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._listen()
+            except Exception as e:
+                print(f"⚠️ Activity notify listener disconnected: {e}")
+            self.connected = False
+            self._stop.wait(self.reconnect_delay)
+
+
+    def _listen(self):
+        connection = engine.raw_connection()
+        # Taken out of the pool for good: a LISTENing connection must not be handed to requests
+        connection.detach()
+        try:
+            driver_connection = connection.driver_connection
+            driver_connection.autocommit = True
+            with driver_connection.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+            self.connected = True
+
+            while not self._stop.is_set():
+                if select.select([driver_connection], [], [], 1.0) == ([], [], []):
+                    continue
+                driver_connection.poll()
+                while driver_connection.notifies:
+                    self._dispatch(driver_connection.notifies.pop(0).payload)
+        finally:
+            connection.close()
+
+
+    def _dispatch(self, payload: str):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        if message.get("origin") == WORKER_ID:
+            return
+        self.received += len(message.get("events", []))
+        self.bus.publish_threadsafe(message.get("events", []))
+
+
+    def stats(self) -> Dict[str, Any]:
+        return {"connected": self.connected, "received": self.received}
+
+
+async def stream_activity_events(
+    activity_type: Optional[str] = None,
+    user_id: Optional[UUID] = None
+) -> AsyncIterator[str]:
+    """Server-sent events for newly persisted activity, with keepalive comments while idle"""
+    subscription = activity_bus.subscribe()
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            if subscription.dropped:
+                yield "event: dropped\ndata: {\"reason\": \"consumer too slow\"}\n\n"
+                return
+
+            event = await subscription.get(settings.ACTIVITY_STREAM_HEARTBEAT_SECONDS)
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            if activity_type and event["activity_type"] != activity_type:
+                continue
+            if user_id and event["user_id"] != str(user_id):
+                continue
+
+            yield f"id: {event['id']}\nevent: activity\ndata: {json.dumps(event)}\n\n"
+    finally:
+        activity_bus.unsubscribe(subscription)
+
+
+activity_bus = EventBus(settings.ACTIVITY_STREAM_QUEUE_SIZE)
+notify_listener = NotifyListener(activity_bus, settings.ACTIVITY_STREAM_CHANNEL)
\ No newline at end of file
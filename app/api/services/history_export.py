@@ -0,0 +1,110 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterator, List
+from uuid import UUID
+
+from app.config import settings
+from app.core.serialization import json_default
+from app.core.database import SessionLocal
+from app.api.repositories import ActivityLogRepository
+
+
+EXPORT_TYPES = ("activities",)
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv")
+}
+
+ACTIVITY_COLUMNS = [
+    "id", "user_id", "activity_type", "action", "description", "resource_type",
+    "resource_id", "activity_metadata", "ip_address", "user_agent", "created_at"
+]
+
+
+def _csv_value(value: Any):
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=json_default)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _encode_ndjson(rows: List[Dict[str, Any]], header: bool) -> bytes:
+    return "".join(json.dumps(row, default=json_default) + "\n" for row in rows).encode("utf-8")
+
+
+def _encode_csv(rows: List[Dict[str, Any]], header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(ACTIVITY_COLUMNS)
+    writer.writerows([_csv_value(row[column]) for column in ACTIVITY_COLUMNS] for row in rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def export_filename(export_type: str, export_format: str, compress: bool) -> str:
+    extension = EXPORT_FORMATS[export_format][1]
+    name = f"{export_type}_{datetime.utcnow():%Y%m%dT%H%M%S}.{extension}"
+    return f"{name}.gz" if compress else name
+
+
+def media_type(export_format: str, compress: bool) -> str:
+    return "application/gzip" if compress else EXPORT_FORMATS[export_format][0]
+
+
+def iter_activity_export(
+    export_format: str,
+    compress: bool = False,
+    start: datetime = None,
+    end: datetime = None,
+    user_id: UUID = None
+) -> Iterator[bytes]:
+    """
+    Stream activity logs as NDJSON or CSV bytes, optionally gzip-compressed.
+
+    The generator owns its session: a StreamingResponse body keeps running
+    after the request's own session has been closed. Rows come through a
+    server-side cursor and are encoded and flushed in fixed-size chunks,
+    so memory does not grow with the size of the export.
+    """
+    encode = _encode_csv if export_format == "csv" else _encode_ndjson
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None
+    batch_size = settings.HISTORY_EXPORT_BATCH_SIZE
+    chunk_bytes = settings.HISTORY_EXPORT_CHUNK_BYTES
+
+    def emit(data: bytes) -> bytes:
+        return compressor.compress(data) if compressor else data
+
+    db = SessionLocal()
+    # Exports never write, so the cursor may be served by a read replica
+    db.info["use_replica"] = True
+    try:
+        rows = ActivityLogRepository(db).stream_activities(start=start, end=end, user_id=user_id, batch_size=batch_size)
+
+        pending = bytearray()
+        batch: List[Dict[str, Any]] = []
+        header = True
+        for row in rows:
+            batch.append(row)
+            if len(batch) < batch_size:
+                continue
+            pending += emit(encode(batch, header))
+            header = False
+            batch = []
+            if len(pending) >= chunk_bytes:
+                yield bytes(pending)
+                pending.clear()
+
+        if batch or header:
+            pending += emit(encode(batch, header))
+        if compressor:
+            pending += compressor.flush()
+        if pending:
+            yield bytes(pending)
+    finally:
+        db.close()
\ No newline at end of file
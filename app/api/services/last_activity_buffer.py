@@ -0,0 +1,84 @@
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.core.background import PeriodicTask
+from app.core.database import SessionLocal
+from app.api.repositories import UserRepository, AsyncUserRepository
+
+
+
+class LastActivityBuffer:
+    """
+    Write-behind buffer for `user_profiles.last_activity_at`.
+
+    Requests only record the latest timestamp per user in memory; a
+    periodic flush writes all of them in a single multi-row UPDATE.
+    With a flush interval of 0 the buffer is disabled and callers write
+    through to the database as before.
+    """
+
+    def __init__(self, flush_interval: float):
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+        self._task = PeriodicTask("last_activity flush", flush_interval, self.flush)
+
+
+    @property
+    def enabled(self) -> bool:
+        return self.flush_interval > 0
+
+
+    def touch(self, supabase_user_id: str, at: Optional[datetime] = None) -> datetime:
+        at = at or datetime.utcnow()
+        with self._lock:
+            previous = self._pending.get(supabase_user_id)
+            if previous is None or at > previous:
+                self._pending[supabase_user_id] = at
+        return at
+
+
+    async def record(self, user_repo: AsyncUserRepository, supabase_user_id: str) -> datetime:
+        """Buffer the activity, or write it immediately when buffering is disabled"""
+        if self.enabled:
+            return self.touch(supabase_user_id)
+
+        user = await user_repo.update_last_activity(supabase_user_id)
+        return user.last_activity_at if user else datetime.utcnow()
+
+
+    def flush(self) -> int:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        if not pending:
+            return 0
+
+        db = SessionLocal()
+        try:
+            return UserRepository(db).bulk_update_last_activity(pending)
+        except Exception:
+            db.rollback()
+            for supabase_user_id, at in pending.items():
+                self.touch(supabase_user_id, at)
+            raise
+        finally:
+            db.close()
+
+
+    def start(self):
+        if self.enabled:
+            self._task.start()
+
+
+    async def stop(self):
+        """Stop the periodic flush and drain whatever is still buffered"""
+        await self._task.stop()
+        await run_in_threadpool(self.flush)
+
+
+last_activity_buffer = LastActivityBuffer(settings.LAST_ACTIVITY_FLUSH_SECONDS)
\ No newline at end of file
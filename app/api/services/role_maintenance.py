@@ -0,0 +1,29 @@
+from typing import Any, Dict, List
+
+from app.config import settings
+from app.core.background import PeriodicTask
+from app.core.database import SessionLocal
+from app.api.repositories import RoleRepository
+
+
+def reconcile_role_user_counts() -> List[Dict[str, Any]]:
+    """Repair roles.users_count from the actual role assignments"""
+    db = SessionLocal()
+    try:
+        drift = RoleRepository(db).reconcile_users_count()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    for correction in drift:
+        print(f"⚠️ Role '{correction['role']}' users_count drifted: {correction['stored']} -> {correction['actual']}")
+    return drift
+
+
+role_count_reconcile = PeriodicTask(
+    "roles users_count reconcile",
+    settings.ROLE_USERS_COUNT_RECONCILE_SECONDS,
+    reconcile_role_user_counts
+)
\ No newline at end of file
@@ -1,116 +1,141 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List, Dict, Any
 from uuid import UUID
 
 from app.api.models.user import Role
-from app.api.repositories import RoleRepository
+from app.api.repositories import AsyncRoleRepository
+from app.core.principals import invalidate_role_principals
+from app.core.role_catalog import role_catalog, CatalogRole
 from fastapi import HTTPException
 
 
 
 class RoleService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session | AsyncSession):
         self.db = db
-        self.role_repo = RoleRepository(db)
+        self.role_repo = AsyncRoleRepository(db)
 
 
-    async def get_role_by_id(self, role_id: UUID) -> Optional[Role]:
-        return self.role_repo.get(role_id)
+    async def get_role_by_id(self, role_id: UUID) -> Optional[CatalogRole]:
+        return await role_catalog.get(self.role_repo, role_id)
 
 
-    async def get_role_by_name(self, name: str) -> Optional[Role]:
-        return self.role_repo.get_by_name(name)
+    async def get_role_by_name(self, name: str) -> Optional[CatalogRole]:
+        return await role_catalog.get_by_name(self.role_repo, name)
 
 
-    async def get_all_roles(self, skip: int = 0, limit: int = 100) -> List[Role]:
-        return self.role_repo.get_multi(skip=skip, limit=limit, order_by="name")
+    async def get_all_roles(self, skip: int = 0, limit: int = 100) -> List[CatalogRole]:
+        roles = await role_catalog.all(self.role_repo)
+        return roles[skip:skip + limit]
 
 
     async def get_all_roles_with_user_count(self) -> List[Dict[str, Any]]:
-        return self.role_repo.get_all_with_users_count()
+        return await self.role_repo.get_all_with_users_count()
+
+
+    async def get_role_users_count(self, role_id: UUID) -> int:
+        return await self.role_repo.get_users_count(role_id)
 
 
     async def create_role(self, role_data: dict) -> Role:
-        existing_role = self.role_repo.get_by_name(role_data.get("name"))
+        existing_role = await self.role_repo.get_by_name(role_data.get("name"))
         if existing_role:
             raise HTTPException(
                 status_code=400, 
                 detail=f"Role with name '{role_data.get('name')}' already exists"
             )
         
-        return self.role_repo.create(role_data)
+        new_role = await self.role_repo.create(role_data)
+        role_catalog.bump()
+        return new_role
 
 
     async def update_role(self, role_id: UUID, update_data: dict) -> Optional[Role]:
-        role = self.role_repo.get(role_id)
+        role = await self.role_repo.get(role_id)
         if not role:
             raise HTTPException(status_code=404, detail="Role not found")
         
         if "name" in update_data:
-            existing_role = self.role_repo.get_by_name(update_data["name"])
+            existing_role = await self.role_repo.get_by_name(update_data["name"])
             if existing_role and existing_role.id != role_id:
                 raise HTTPException(
                     status_code=400,
                     detail=f"Role with name '{update_data['name']}' already exists"
                 )
         
-        return self.role_repo.update(role, update_data)
+        updated_role = await self.role_repo.update(role, update_data)
+        self._role_changed(role_id)
+        return updated_role
 
 
     async def delete_role(self, role_id: UUID) -> Optional[Role]:
-        role = self.role_repo.get(role_id)
+        role = await self.role_repo.get(role_id)
         if not role:
             raise HTTPException(status_code=404, detail="Role not found")
         
-        
-        return self.role_repo.delete(role_id)
+        deleted_role = await self.role_repo.delete(role_id)
+        self._role_changed(role_id)
+        return deleted_role
 
 
     async def search_roles(self, search_term: str) -> List[Role]:
-        return self.role_repo.search(search_term, ["name", "description"])
+        return await self.role_repo.search(search_term, ["name", "description"])
 
 
     async def get_role_permissions(self, role_id: UUID) -> List[str]:
-        role = self.role_repo.get(role_id)
+        role = await role_catalog.get(self.role_repo, role_id)
         if not role:
             raise HTTPException(status_code=404, detail="Role not found")
         
-        return role.permissions or []
+        return list(role.permissions)
 
 
     async def update_role_permissions(self, role_id: UUID, permissions: List[str]) -> Role:
-        role = self.role_repo.get(role_id)
+        role = await self.role_repo.get(role_id)
         if not role:
             raise HTTPException(status_code=404, detail="Role not found")
         
-        return self.role_repo.update(role, {"permissions": permissions})
+        updated_role = await self.role_repo.update(role, {"permissions": permissions})
+        self._role_changed(role_id)
+        return updated_role
 
 
     async def add_permission_to_role(self, role_id: UUID, permission: str) -> Role:
-        role = self.role_repo.get(role_id)
+        role = await self.role_repo.get(role_id)
         if not role:
             raise HTTPException(status_code=404, detail="Role not found")
         
-        current_permissions = role.permissions or []
+        current_permissions = list(role.permissions or [])
         if permission not in current_permissions:
             current_permissions.append(permission)
-            return self.role_repo.update(role, {"permissions": current_permissions})
+            updated_role = await self.role_repo.update(role, {"permissions": current_permissions})
+            self._role_changed(role_id)
+            return updated_role
         
         return role
 
 
     async def remove_permission_from_role(self, role_id: UUID, permission: str) -> Role:
-        role = self.role_repo.get(role_id)
+        role = await self.role_repo.get(role_id)
         if not role:
             raise HTTPException(status_code=404, detail="Role not found")
         
-        current_permissions = role.permissions or []
+        current_permissions = list(role.permissions or [])
         if permission in current_permissions:
             current_permissions.remove(permission)
-            return self.role_repo.update(role, {"permissions": current_permissions})
+            updated_role = await self.role_repo.update(role, {"permissions": current_permissions})
+            self._role_changed(role_id)
+            return updated_role
         
         return role
 
 
     async def initialize_default_roles(self):
-        self.role_repo.initialize_default_roles()
\ No newline at end of file
+        await self.role_repo.initialize_default_roles()
+        role_catalog.bump()
+
+
+    def _role_changed(self, role_id: UUID):
+        role_catalog.bump()
+        invalidate_role_principals(role_id)
\ No newline at end of file
@@ -0,0 +1,105 @@
+import threading
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.core.background import PeriodicTask
+from app.core.database import SessionLocal
+from app.core.hyperloglog import HyperLogLog
+from app.api.repositories import ActivityUserSketchRepository
+
+
+
+class UniqueUserSketches:
+    """
+    Write-behind buffer of per-day HyperLogLog sketches of active users.
+
+    Writers add user ids to in-memory sketches; a periodic flush merges
+    them into `activity_user_sketches`. Reads merge the stored days with
+    whatever is still pending, so estimates include unflushed activity.
+    A flush interval of 0 disables sketches and summaries count exactly.
+    """
+
+    def __init__(self, flush_interval: float):
+        self.flush_interval = flush_interval
+        self._pending: Dict[date, HyperLogLog] = {}
+        self._lock = threading.Lock()
+        self._task = PeriodicTask("unique user sketch flush", flush_interval, self.flush)
+
+
+    @property
+    def enabled(self) -> bool:
+        return self.flush_interval > 0
+
+
+    def add(self, rows: Iterable[Dict[str, Any]]):
+        if not self.enabled:
+            return
+        with self._lock:
+            for row in rows:
+                day = row["created_at"].date()
+                sketch = self._pending.get(day)
+                if sketch is None:
+                    sketch = self._pending[day] = HyperLogLog()
+                sketch.add(str(row["user_id"]))
+
+
+    def merge_pending(self, sketches: Dict[date, HyperLogLog], start: date, end: date) -> HyperLogLog:
+        """Union of the given stored days and the pending in-memory ones within [start, end]"""
+        merged = HyperLogLog.union(sketch for day, sketch in sketches.items() if start <= day <= end)
+        with self._lock:
+            for day, sketch in self._pending.items():
+                if start <= day <= end:
+                    merged.merge(sketch)
+        return merged
+
+
+    def covers(self, sketches: Dict[date, HyperLogLog], start: date, end: date) -> bool:
+        """Whether every day in [start, end] has a stored or pending sketch"""
+        with self._lock:
+            days = set(sketches) | set(self._pending)
+        return all(start + timedelta(days=offset) in days for offset in range((end - start).days + 1))
+
+
+    def estimate(self, sketches: Dict[date, HyperLogLog], start: date, end: date) -> int:
+        """Distinct users within [start, end]; CPU-bound, so callers run it in the threadpool"""
+        return self.merge_pending(sketches, start, end).count()
+
+
+    def flush(self) -> int:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        if not pending:
+            return 0
+
+        db = SessionLocal()
+        try:
+            return ActivityUserSketchRepository(db).merge_days(pending)
+        except Exception:
+            db.rollback()
+            with self._lock:
+                for day, sketch in pending.items():
+                    if day in self._pending:
+                        self._pending[day].merge(sketch)
+                    else:
+                        self._pending[day] = sketch
+            raise
+        finally:
+            db.close()
+
+
+    def start(self):
+        if self.enabled:
+            self._task.start()
+
+
+    async def stop(self):
+        """Stop the periodic flush and persist whatever is still pending"""
+        await self._task.stop()
+        await run_in_threadpool(self.flush)
+
+
+unique_user_sketches = UniqueUserSketches(settings.UNIQUE_USER_SKETCH_FLUSH_SECONDS)
\ No newline at end of file
@@ -1,32 +1,83 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, Dict, Any
 from datetime import datetime
 from uuid import UUID
 
 from app.api.models.user import UserProfile, Role
 from app.api.schemas.user import UserProfile as UserProfileSchema, RoleSchema, UpdateProfileRequest
-from app.api.repositories import UserRepository, RoleRepository
-from app.core.security import supabase
+from app.api.repositories import UserRepository, AsyncUserRepository, AsyncRoleRepository, encode_cursor, decode_cursor
+from app.core.security import supabase, forget_user_tokens
+from app.core.permission_matcher import PermissionMatcher, get_role_matcher
+from app.core.principals import Principal, invalidate_principal
+from app.core.role_catalog import role_catalog
+from app.api.services.last_activity_buffer import last_activity_buffer
+from app.core.cache import TTLCache
+from app.core.database import SessionLocal
+from app.config import settings
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+
+user_stats_cache = TTLCache(max_size=1, default_ttl=settings.USER_STATS_CACHE_TTL_SECONDS)
+
+
+def _load_user_stats() -> Dict[str, Any]:
+    """Uses its own session: the shared load can outlive the request that started it"""
+    db = SessionLocal()
+    try:
+        return UserRepository(db).get_user_stats()
+    finally:
+        db.close()
 
 
 
 class UserProfileService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session | AsyncSession):
         self.db = db
-        self.user_repo = UserRepository(db)
-        self.role_repo = RoleRepository(db)
+        self.user_repo = AsyncUserRepository(db)
+        self.role_repo = AsyncRoleRepository(db)
 
     async def get_or_create_user_profile(self, supabase_user_data: dict) -> UserProfileSchema:
         supabase_user_id = supabase_user_data["sub"]
         
-        db_profile = self.user_repo.get_by_supabase_id_with_role(supabase_user_id)
+        db_profile = await self.user_repo.get_by_supabase_id(supabase_user_id)
         
         if not db_profile:
             db_profile = await self._create_user_profile(supabase_user_data)
 
-        self.user_repo.update_last_activity(supabase_user_id)
-        return await self._build_user_profile_response(db_profile, supabase_user_data)
+        last_activity_at = await last_activity_buffer.record(self.user_repo, supabase_user_id)
+        return await self._build_user_profile_response(db_profile, supabase_user_data, last_activity_at)
+
+
+    async def load_principal(self, supabase_user_data: dict) -> Principal:
+        """Build the authorization principal without touching last_activity_at"""
+        supabase_user_id = supabase_user_data["sub"]
+
+        db_profile = await self.user_repo.get_by_supabase_id(supabase_user_id)
+
+        if not db_profile:
+            db_profile = await self._create_user_profile(supabase_user_data)
+
+        role = await role_catalog.get(self.role_repo, db_profile.role_id)
+        if role:
+            matcher = get_role_matcher(role.id, role.permissions)
+        else:
+            matcher = PermissionMatcher([])
+
+        return Principal(
+            id=supabase_user_id,
+            profile_id=db_profile.id,
+            role_id=role.id if role else None,
+            role_name=role.name if role else None,
+            permissions=role.permissions if role else (),
+            matcher=matcher
+        )
+
+
+    def _invalidate_auth_caches(self, supabase_user_id: str):
+        forget_user_tokens(supabase_user_id)
+        invalidate_principal(supabase_user_id)
 
 
     async def _create_user_profile(self, supabase_user_data: dict) -> UserProfile:
@@ -36,7 +87,7 @@ class UserProfileService:
             metadata = supabase_user_data["user_metadata"]
             full_name = metadata.get("full_name") or metadata.get("name")
 
-        default_role = self.role_repo.get_by_name("user")
+        default_role = await role_catalog.get_by_name(self.role_repo, "user")
         
         user_data = {
             "supabase_user_id": supabase_user_data["sub"],
@@ -46,18 +97,22 @@ class UserProfileService:
             "created_at": datetime.utcnow(),
             "last_activity_at": datetime.utcnow()
         }
-        db_profile = self.user_repo.create(user_data)
-        
-        return self.user_repo.get_by_supabase_id_with_role(db_profile.supabase_user_id)
+        return await self.user_repo.create(user_data)
 
 
-    async def _build_user_profile_response(self, db_profile: UserProfile, supabase_user_data: dict) -> UserProfileSchema:
+    async def _build_user_profile_response(
+        self,
+        db_profile: UserProfile,
+        supabase_user_data: dict,
+        last_activity_at: Optional[datetime] = None
+    ) -> UserProfileSchema:
         role_data = None
-        if db_profile.role:
+        role = await role_catalog.get(self.role_repo, db_profile.role_id)
+        if role:
             role_data = RoleSchema(
-                id=db_profile.role.id,
-                name=db_profile.role.name,
-                permissions=db_profile.role.permissions or []
+                id=role.id,
+                name=role.name,
+                permissions=list(role.permissions)
             )
         
         return UserProfileSchema(
@@ -65,14 +120,14 @@ class UserProfileService:
             email=supabase_user_data.get("email", ""),
             full_name=db_profile.full_name,
             role=role_data,
-            last_activity_at=db_profile.last_activity_at,
+            last_activity_at=last_activity_at or db_profile.last_activity_at,
             created_at=db_profile.created_at,
             user_metadata=supabase_user_data.get("user_metadata", {})
         )
 
 
     async def update_user_profile(self, supabase_user_id: str, update_data: dict, current_supabase_data: dict) -> UserProfileSchema:
-        db_profile = self.user_repo.get_by_supabase_id(supabase_user_id)
+        db_profile = await self.user_repo.get_by_supabase_id(supabase_user_id)
         
         if not db_profile:
             raise HTTPException(status_code=404, detail="User profile not found")
@@ -82,15 +137,14 @@ class UserProfileService:
             metadata=update_data.get("metadata")
         )
         
-        updated_profile = self.user_repo.update(db_profile, profile_update)
-        updated_profile_with_role = self.user_repo.get_by_supabase_id_with_role(supabase_user_id)
+        updated_profile = await self.user_repo.update(db_profile, profile_update)
     
-        return await self._build_user_profile_response(updated_profile_with_role, current_supabase_data)
+        return await self._build_user_profile_response(updated_profile, current_supabase_data)
 
 
     async def invite_user(self, email: str, full_name: str, role_id: str) -> dict:
         try:
-            role = self.role_repo.get(UUID(role_id))
+            role = await role_catalog.get(self.role_repo, UUID(role_id))
             if not role:
                 raise HTTPException(status_code=400, detail="Invalid role ID")
             
@@ -113,7 +167,7 @@ class UserProfileService:
                 "last_activity_at": datetime.utcnow()
             }
             
-            db_profile = self.user_repo.create(user_data)
+            db_profile = await self.user_repo.create(user_data)
             
             return {
                 "id": response.user.id,
@@ -130,40 +184,105 @@ class UserProfileService:
 
 
     async def initialize_default_roles(self):
-        self.role_repo.initialize_default_roles()
+        await self.role_repo.initialize_default_roles()
+        role_catalog.bump()
 
 
     async def get_user_by_id(self, user_id: UUID) -> Optional[UserProfile]:
-        return self.user_repo.get_with_role(user_id)
+        return await self.user_repo.get_with_role(user_id)
     
 
-    async def search_users(self, search_term: str, role_id: Optional[UUID] = None) -> list[UserProfile]:
-        return self.user_repo.search_users(search_term, role_id)
+    async def search_users(self, search_term: str, role_id: Optional[UUID] = None, limit: int = 20) -> list[UserProfile]:
+        return await self.user_repo.search_users(search_term, role_id, limit=limit)
     
 
     async def get_users_paginated(self, skip: int = 0, limit: int = 20, **filters) -> Dict[str, Any]:
-        return self.user_repo.get_users_paginated(skip=skip, limit=limit, **filters)
+        return await self.user_repo.get_users_paginated(skip=skip, limit=limit, **filters)
+    
+
+    async def get_users_page(
+        self,
+        limit: int = 25,
+        cursor: str = None,
+        sort: str = "created_at",
+        order_desc: bool = True,
+        role_id: UUID = None,
+        search_term: str = None,
+        include_total: bool = False,
+        exact_total: bool = False
+    ) -> Dict[str, Any]:
+        order = "desc" if order_desc else "asc"
+        after = None
+        if cursor:
+            try:
+                cursor_sort, cursor_order, sort_value, user_id = decode_cursor(cursor)
+                after = (datetime.fromisoformat(sort_value), UUID(user_id))
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            # A cursor only marks a position within the ordering it was issued for
+            if (cursor_sort, cursor_order) != (sort, order):
+                raise HTTPException(status_code=400, detail=f"Cursor was issued for sort={cursor_sort}&order={cursor_order}")
+        
+        filters = {"role_id": role_id, "search_term": search_term}
+        users = await self.user_repo.get_users_page(
+            limit=limit, sort=sort, order_desc=order_desc, after=after, **filters
+        )
+        
+        has_more = len(users) > limit
+        users = users[:limit]
+        
+        page = {
+            "users": users,
+            "has_more": has_more,
+            "next_cursor": encode_cursor(sort, order, getattr(users[-1], sort), users[-1].id) if has_more else None
+        }
+        
+        if include_total or exact_total:
+            total, is_estimate = await self.user_repo.count_users(exact=exact_total, **filters)
+            page["total"] = total
+            page["total_is_estimate"] = is_estimate
+        
+        return page
     
 
     async def update_user_role(self, user_id: UUID, role_id: UUID) -> Optional[UserProfile]:
-        return self.user_repo.update_user_role(user_id, role_id)
+        user = await self.user_repo.update_user_role(user_id, role_id)
+        if user:
+            self._invalidate_auth_caches(user.supabase_user_id)
+        return user
+
+
+    async def refresh_user_auth_cache(self, user_id: UUID) -> Optional[UserProfile]:
+        """
+        Forget the user's cached token and principal so the next request re-verifies
+        the token and reloads role and permissions. Does not block the user.
+        """
+        user = await self.user_repo.get(user_id)
+        if user:
+            self._invalidate_auth_caches(user.supabase_user_id)
+        return user
     
 
     async def get_user_stats(self) -> Dict[str, Any]:
-        return self.user_repo.get_user_stats()
+        """Dashboard statistics; concurrent requests share one query per cache interval"""
+        return await user_stats_cache.get_or_load("user_stats", lambda: run_in_threadpool(_load_user_stats))
     
 
     async def get_recent_users(self, days: int = 7, limit: int = 10) -> list[UserProfile]:
-        return self.user_repo.get_recent_users(days, limit)
+        return await self.user_repo.get_recent_users(days, limit)
     
 
     async def get_users_by_role_name(self, role_name: str) -> list[UserProfile]:
-        return self.user_repo.get_users_by_role_name(role_name)
+        return await self.user_repo.get_users_by_role_name(role_name)
     
 
     async def get_active_users_count(self, days: int = 30) -> int:
-        return self.user_repo.get_active_users_count(days)
+        return await self.user_repo.get_active_users_count(days)
     
 
     async def bulk_update_role(self, user_ids: list[UUID], role_id: UUID) -> int:
-        return self.user_repo.bulk_update_role(user_ids, role_id)
\ No newline at end of file
+        supabase_user_ids = await self.user_repo.get_supabase_ids(user_ids)
+        updated_count = await self.user_repo.bulk_update_role(user_ids, role_id)
+        for supabase_user_id in supabase_user_ids:
+            self._invalidate_auth_caches(supabase_user_id)
+        return updated_count
\ No newline at end of file
@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional
 from uuid import UUID
 
 from app.core.security import get_current_user
-from app.api.dependencies import get_database
+from app.api.dependencies import get_database, release_database
 from app.api.services.user_service import UserProfileService
 from app.api.services.role_service import RoleService
 from app.api.services.activity_log_service import ActivityLogService
+from app.api.services.activity_retention import activity_retention, RetentionJobRunning
+from app.api.services.activity_stream import stream_activity_events
+from app.core.hyperloglog import standard_error
 from app.api.schemas.admin import (
     AdminUsersListResponse, AdminUserDetailResponse, AdminCreateUserRequest,
     AdminUpdateUserRequest, AdminRolesListResponse, AdminRoleDetailResponse,
@@ -15,6 +19,7 @@ from app.api.schemas.admin import (
     AdminPermissionCategoriesResponse, AdminActivityLogsResponse, AdminActivitySummaryResponse
 )
 from app.core.permissions import require_permissions
+from app.config import settings
 
 router = APIRouter()
 
@@ -22,25 +27,59 @@ router = APIRouter()
 
 @router.get("/users", response_model=AdminUsersListResponse)
 async def get_users(
-    page: int = Query(1, ge=1),
+    response: Response,
     limit: int = Query(25, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    page: Optional[int] = Query(None, ge=1, deprecated=True),
+    sort: str = Query("created_at", pattern="^(created_at|updated_at)$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
     status: Optional[str] = Query(None),
     role_id: Optional[UUID] = Query(None),
     search: Optional[str] = Query(None),
+    include_total: bool = Query(False),
+    exact_total: bool = Query(False),
     admin_profile = Depends(require_permissions(["admin.users.read"])),
     db: Session = Depends(get_database)
 ):
     try:
         user_service = UserProfileService(db)
         
-        skip = (page - 1) * limit
-        filters = {}
-        if role_id:
-            filters["role_id"] = role_id
-        if search:
-            filters["search_term"] = search
-        
-        result = await user_service.get_users_paginated(skip=skip, limit=limit, **filters)
+        if page is not None and cursor is None:
+            # Offset pages from before keyset pagination, kept until clients move to cursors
+            response.headers["Deprecation"] = "true"
+            result = await user_service.get_users_paginated(
+                skip=(page - 1) * limit,
+                limit=limit,
+                role_id=role_id,
+                search_term=search,
+                order_by=sort,
+                order_desc=order == "desc"
+            )
+            pagination = {
+                "page": result["page"],
+                "limit": result["per_page"],
+                "total": result["total"],
+                "total_pages": result["total_pages"]
+            }
+        else:
+            result = await user_service.get_users_page(
+                limit=limit,
+                cursor=cursor,
+                sort=sort,
+                order_desc=order == "desc",
+                role_id=role_id,
+                search_term=search,
+                include_total=include_total,
+                exact_total=exact_total
+            )
+            pagination = {
+                "limit": limit,
+                "next_cursor": result["next_cursor"],
+                "has_more": result["has_more"]
+            }
+            if "total" in result:
+                pagination["total"] = result["total"]
+                pagination["total_is_estimate"] = result["total_is_estimate"]
         
         users_data = []
         for user in result["users"]:
@@ -62,18 +101,27 @@ async def get_users(
         
         return AdminUsersListResponse(
             users=users_data,
-            pagination={
-                "page": result["page"],
-                "limit": result["per_page"],
-                "total": result["total"],
-                "total_pages": result["total_pages"]
-            }
+            pagination=pagination
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving users: {str(e)}")
 
 
+@router.get("/users/stats")
+async def get_user_stats(
+    admin_profile = Depends(require_permissions(["admin.users.read"])),
+    db: Session = Depends(get_database)
+):
+    try:
+        user_service = UserProfileService(db)
+        return {"stats": await user_service.get_user_stats()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving user statistics: {str(e)}")
+
+
 @router.get("/users/{user_id}", response_model=AdminUserDetailResponse)
 async def get_user_by_id(
     user_id: UUID,
@@ -225,6 +273,12 @@ async def deactivate_user(
 ):
     """Deactivate user account"""
     try:
+        user_service = UserProfileService(db)
+        # Deactivation is not persisted yet: this only drops cached credentials, so an unexpired token keeps working
+        user = await user_service.refresh_user_auth_cache(user_id)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+
         return {
             "message": "User deactivated successfully",
             "user": {
@@ -233,6 +287,8 @@ async def deactivate_user(
                 "updated_at": "2024-01-01T00:00:00Z"
             }
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deactivating user: {str(e)}")
 
@@ -309,7 +365,7 @@ async def get_role_by_id(
             description=role.description,
             is_system_role=role.name in ["admin", "manager", "user"],
             permissions=permissions,
-            user_count=0,
+            user_count=await role_service.get_role_users_count(role_id),
             created_at=role.created_at,
             updated_at=role.updated_at
         )
@@ -453,24 +509,29 @@ async def get_permission_categories(
 
 @router.get("/activity-logs", response_model=AdminActivityLogsResponse)
 async def get_activity_logs(
-    page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
     user_id: Optional[UUID] = Query(None),
     activity_type: Optional[str] = Query(None),
     resource_type: Optional[str] = Query(None),
+    include_total: bool = Query(False),
     admin_profile = Depends(require_permissions(["admin.activity.read"])),
     db: Session = Depends(get_database)
 ):
     try:
         activity_service = ActivityLogService(db)
         
-        activities = await activity_service.get_recent_activities(
+        result = await activity_service.get_activity_logs_page(
             limit=limit,
-            activity_types=[activity_type] if activity_type else None
+            cursor=cursor,
+            user_id=user_id,
+            activity_type=activity_type,
+            resource_type=resource_type,
+            include_total=include_total
         )
         
         activities_data = []
-        for activity in activities:
+        for activity in result["activities"]:
             activities_data.append({
                 "id": str(activity.id),
                 "user_id": str(activity.user_id),
@@ -487,15 +548,21 @@ async def get_activity_logs(
                 "timestamp": activity.created_at
             })
         
+        pagination = {
+            "limit": limit,
+            "next_cursor": result["next_cursor"],
+            "has_more": result["has_more"]
+        }
+        if include_total:
+            pagination["total"] = result["total"]
+            pagination["total_is_estimate"] = result["total_is_estimate"]
+        
         return AdminActivityLogsResponse(
             activities=activities_data,
-            pagination={
-                "page": page,
-                "limit": limit,
-                "total": len(activities),
-                "total_pages": 1
-            }
+            pagination=pagination
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving activity logs: {str(e)}")
 
@@ -512,16 +579,111 @@ async def get_activity_summary(
         
         summary_data = {
             "total_activities": stats["total_activities"],
-            "unique_users": 0,
-            "most_active_user": {
+            "unique_users": stats["unique_users"],
+            "unique_users_is_estimate": stats.get("unique_users_is_estimate", False),
+            "unique_users_relative_error": stats.get("unique_users_relative_error"),
+            "most_active_user": stats["most_active_user"] or {
                 "user_id": "unknown",
                 "user_name": "Unknown",
                 "activity_count": 0
             },
             "activity_types": stats["activity_breakdown"],
-            "daily_activity": []
+            "daily_activity": stats["daily_activity"]
         }
         
         return AdminActivitySummaryResponse(summary=summary_data)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error retrieving activity summary: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error retrieving activity summary: {str(e)}")
+
+
+@router.get("/activity-logs/trend")
+async def get_activity_trend(
+    days: int = Query(7, ge=1, le=365),
+    granularity: str = Query("hour", pattern="^(hour|day)$"),
+    activity_type: Optional[str] = Query(None),
+    admin_profile = Depends(require_permissions(["admin.activity.read"])),
+    db: Session = Depends(get_database)
+):
+    try:
+        activity_service = ActivityLogService(db)
+        trend = await activity_service.get_activity_trend(
+            days_back=days,
+            granularity=granularity,
+            activity_type=activity_type
+        )
+        return {"granularity": granularity, "period_days": days, "buckets": trend}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving activity trend: {str(e)}")
+
+
+@router.get("/activity-logs/unique-users")
+async def get_unique_users(
+    granularity: str = Query("day", pattern="^(day|week|month)$"),
+    periods: int = Query(30, ge=1, le=366),
+    admin_profile = Depends(require_permissions(["admin.activity.read"])),
+    db: Session = Depends(get_database)
+):
+    """Approximate unique users per period from the daily HyperLogLog sketches"""
+    try:
+        activity_service = ActivityLogService(db)
+        series = await activity_service.get_unique_users_series(granularity=granularity, periods=periods)
+        return {
+            "granularity": granularity,
+            "is_estimate": True,
+            "relative_error": round(standard_error(), 4),
+            "periods": series
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving unique users: {str(e)}")
+
+
+@router.get("/activity-logs/stream")
+async def stream_activity_logs(
+    activity_type: Optional[str] = Query(None),
+    user_id: Optional[UUID] = Query(None),
+    admin_profile = Depends(require_permissions(["admin.activity.read"])),
+    db: Session = Depends(get_database)
+):
+    """Server-sent events for activity as it is persisted, instead of polling"""
+    # The stream never touches the database; do not pin a pooled connection for its lifetime
+    await release_database(db)
+    return StreamingResponse(
+        stream_activity_events(activity_type=activity_type, user_id=user_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/activity-logs/retention", status_code=202)
+async def start_activity_retention(
+    days: int = Query(settings.ACTIVITY_RETENTION_DAYS, ge=1),
+    archive: bool = Query(settings.ACTIVITY_ARCHIVE_ENABLED),
+    admin_profile = Depends(require_permissions(["admin.activity.delete"]))
+):
+    """Start the chunked retention job in the background"""
+    try:
+        return {"job": activity_retention.start(days_to_keep=days, archive=archive)}
+    except RetentionJobRunning:
+        raise HTTPException(status_code=409, detail="A retention run is already in progress")
+
+
+@router.get("/activity-logs/retention")
+async def get_activity_retention_status(
+    admin_profile = Depends(require_permissions(["admin.activity.read"]))
+):
+    """Progress of the current or last retention run"""
+    return {"job": activity_retention.status()}
+
+
+@router.post("/activity-logs/retention/cancel")
+async def cancel_activity_retention(
+    admin_profile = Depends(require_permissions(["admin.activity.delete"]))
+):
+    """Stop the running retention job after its current batch"""
+    if not activity_retention.cancel():
+        raise HTTPException(status_code=409, detail="No retention run in progress")
+    return {"message": "Retention run will stop after the current batch", "job": activity_retention.status()}
\ No newline at end of file
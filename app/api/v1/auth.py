@@ -5,8 +5,11 @@ from app.api.dependencies import get_database
 from app.api.services.user_service import UserProfileService
 from app.api.services.activity_log_service import ActivityLogService
 from app.api.schemas.user import UserProfileResponse, UpdateProfileRequest, InviteUserRequest, InviteUserResponse
-from app.api.schemas.activity_log import LogActivityRequest, LogActivityResponse
-from app.core.permissions import require_permissions
+from app.api.schemas.activity_log import (
+    LogActivityRequest, LogActivityResponse, LogActivityBatchRequest, LogActivityBatchResponse
+)
+from app.core.permissions import require_permissions, get_principal
+from app.api.services.activity_ingestion import activity_ingestion
 
 router = APIRouter()
 
@@ -154,6 +157,20 @@ async def log_activity(
         
         ip_address = request.client.host if request.client else None
         user_agent = request.headers.get("user-agent")
+
+        if activity_ingestion.running:
+            principal = await get_principal(current_user, db)
+            row = await activity_service.ingest_activity(
+                principal=principal,
+                activity_data=activity_data,
+                ip_address=ip_address,
+                user_agent=user_agent
+            )
+            return LogActivityResponse(
+                message="Activity accepted",
+                activity_id=row["id"],
+                logged_at=row["created_at"]
+            )
         
         activity_log = await activity_service.log_activity(
             supabase_user_id=current_user["sub"],
@@ -174,4 +191,37 @@ async def log_activity(
         raise HTTPException(
             status_code=500,
             detail=f"Error logging activity: {str(e)}"
+        )
+
+
+@router.post("/log-activity/batch", response_model=LogActivityBatchResponse)
+async def log_activity_batch(
+    batch: LogActivityBatchRequest,
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_database)
+):
+    try:
+        activity_service = ActivityLogService(db)
+        principal = await get_principal(current_user, db)
+
+        rows = await activity_service.log_activities(
+            principal=principal,
+            activities=batch.events,
+            ip_address=request.client.host if request.client else None,
+            user_agent=request.headers.get("user-agent")
+        )
+
+        return LogActivityBatchResponse(
+            message=f"{len(rows)} activities logged successfully",
+            activity_ids=[row["id"] for row in rows],
+            logged_at=rows[0]["created_at"]
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error logging activities: {str(e)}"
         )
\ No newline at end of file
@@ -1,11 +1,21 @@
 from app.core.security import get_current_user
 from fastapi import APIRouter, Depends, HTTPException
 import httpx
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from app.config import settings
 from app.api.dependencies import get_database
-from app.core.database import check_database_connection
+from app.core.permissions import require_permissions
+from app.core.database import check_database_connection, engine, async_engine, pool_status, replica_set
+from app.core.security import token_cache
+from app.core.permission_matcher import role_matcher_stats
+from app.core.principals import principal_cache
+from app.core.role_catalog import role_catalog
+from app.api.services.user_service import user_stats_cache
+from app.api.services.activity_ingestion import activity_ingestion
+from app.api.services.activity_stream import activity_bus, notify_listener
 
 router = APIRouter()
 
@@ -25,8 +35,10 @@ async def health_check():
 async def database_health_check(db: Session = Depends(get_database)):
     """Database health check endpoint"""
     try:
-        with db.connection() as conn:
-            conn.execute(text("SELECT 1"))
+        if isinstance(db, AsyncSession):
+            await db.execute(text("SELECT 1"))
+        else:
+            await run_in_threadpool(db.execute, text("SELECT 1"))
         return {
             "status": "healthy",
             "database": "connected",
@@ -37,4 +49,49 @@ async def database_health_check(db: Session = Depends(get_database)):
             "status": "unhealthy",
             "database": "disconnected",
             "message": f"Database connection failed: {str(e)}"
-        }
\ No newline at end of file
+        }
+
+
+@router.get("/cache")
+async def cache_stats(
+    admin_profile = Depends(require_permissions(["settings.read"]))
+):
+    """In-process cache statistics"""
+    return {
+        "token_cache": token_cache.stats(),
+        "permission_matchers": role_matcher_stats(),
+        "principal_cache": principal_cache.stats(),
+        "user_stats_cache": user_stats_cache.stats(),
+        "role_catalog": role_catalog.stats()
+    }
+
+
+@router.get("/db/pool")
+async def database_pool_stats(
+    admin_profile = Depends(require_permissions(["settings.read"]))
+):
+    """Connection pool saturation statistics"""
+    stats = {"primary": pool_status(engine)}
+    if async_engine is not None:
+        stats["primary_async"] = pool_status(async_engine)
+    for index, replica in enumerate(replica_set.replicas):
+        stats[f"replica_{index}"] = pool_status(replica.engine)
+    return stats
+
+
+@router.get("/db/replicas")
+async def database_replicas_health(
+    admin_profile = Depends(require_permissions(["settings.read"]))
+):
+    """Read replica rotation state"""
+    return {"replicas": replica_set.status()}
+
+
+@router.get("/ingestion")
+async def ingestion_stats(
+    admin_profile = Depends(require_permissions(["settings.read"]))
+):
+    """Activity ingestion queue and stream statistics"""
+    stats = activity_ingestion.stats()
+    stats["stream"] = {**activity_bus.stats(), "notify": notify_listener.stats() if settings.ACTIVITY_STREAM_NOTIFY else None}
+    return stats
\ No newline at end of file
@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import datetime, timezone
+from uuid import UUID
+
+from app.core.security import get_current_user
+from app.api.dependencies import get_database, release_database
+from app.core.permissions import get_principal
+from app.api.services.history_export import (
+    EXPORT_TYPES, EXPORT_FORMATS, iter_activity_export, export_filename, media_type
+)
+
+router = APIRouter()
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Bounds compare against created_at, stored as naive UTC; an offset-aware value is converted to match"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@router.get("/export")
+async def export_history(
+    type: str = Query("activities"),
+    format: str = Query("ndjson"),
+    gzip: bool = Query(False),
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None),
+    user_id: Optional[UUID] = Query(None),
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_database)
+):
+    """Stream history as NDJSON or CSV; users export their own, admins anyone's"""
+    if type not in EXPORT_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported export type '{type}'. Available: {', '.join(EXPORT_TYPES)}")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format '{format}'. Available: {', '.join(EXPORT_FORMATS)}")
+    start_date, end_date = _naive_utc(start_date), _naive_utc(end_date)
+    if start_date and end_date and start_date >= end_date:
+        raise HTTPException(status_code=400, detail="start_date must be before end_date")
+
+    try:
+        principal = await get_principal(current_user, db)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error starting export: {str(e)}")
+
+    if not principal.matcher.matches("admin.activity.read"):
+        if user_id and user_id != principal.profile_id:
+            raise HTTPException(status_code=403, detail="Access denied: Cannot export another user's history")
+        user_id = principal.profile_id
+
+    # The export reads through its own session; do not hold this one for the whole download
+    await release_database(db)
+    return StreamingResponse(
+        iter_activity_export(format, compress=gzip, start=start_date, end=end_date, user_id=user_id),
+        media_type=media_type(format, gzip),
+        headers={"Content-Disposition": f'attachment; filename="{export_filename(type, format, gzip)}"'}
+    )
\ No newline at end of file
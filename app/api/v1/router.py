@@ -6,9 +6,10 @@ from app.config import settings
 from app.api.dependencies import get_database
 from app.core.database import check_database_connection
 
-from app.api.v1 import auth, health, admin
+from app.api.v1 import auth, health, admin, history
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(health.router, prefix="/health", tags=["health"])
-api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
\ No newline at end of file
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
+api_router.include_router(history.router, prefix="/history", tags=["history"])
\ No newline at end of file
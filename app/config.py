@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Optional, Dict
 import os
 
 class Settings(BaseSettings):
@@ -8,13 +8,106 @@ class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
     
     DATABASE_URL: str = ""
+    # Serve requests through an AsyncEngine/AsyncSession (asyncpg for PostgreSQL).
+    # Not a performance mode: repositories still run their sync code through run_sync, and on SQLite this
+    # measured ~0.6x the sync throughput. Benchmark with scripts/benchmark_async_mode.py before enabling
+    DATABASE_ASYNC: bool = False
+    ASYNC_DATABASE_URL: str = ""
+
+    # Size the pool against the number of workers: each worker owns its own pool
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 300
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+
+    # Read-only repository methods are spread round-robin over these replicas
+    DATABASE_REPLICA_URLS: list[str] = []
+    DATABASE_REPLICA_RETRY_SECONDS: float = 30
+    DATABASE_REPLICA_PROBE_SECONDS: float = 15
     SUPABASE_PROJECT_ID: str = ""
     SUPABASE_ANON_KEY: str = ""
     
     SECRET_KEY: str = ""
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     ALGORITHM: str = "HS256"
-    
+
+    # "local" verifies JWTs in-process, "remote" asks Supabase on every request
+    AUTH_VERIFICATION_MODE: str = "local"
+    AUTH_REMOTE_FALLBACK: bool = False
+    JWT_AUDIENCE: Optional[str] = "authenticated"
+    JWT_LEEWAY_SECONDS: int = 0
+    JWKS_URL: Optional[str] = None
+    JWKS_CACHE_TTL_SECONDS: int = 600
+    JWKS_MIN_REFRESH_INTERVAL_SECONDS: int = 30
+
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+    TOKEN_CACHE_TTL_SECONDS: int = 300
+
+    PERMISSION_CACHE_MAX_SIZE: int = 1000
+    PERMISSION_CACHE_TTL_SECONDS: int = 300
+
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+
+    USER_STATS_CACHE_TTL_SECONDS: int = 30
+
+    # Upper bound on how long another worker's role changes take to show up locally
+    ROLE_CATALOG_MAX_AGE_SECONDS: float = 60
+
+    # How often roles.users_count is recounted from user_profiles; 0 disables the periodic repair
+    ROLE_USERS_COUNT_RECONCILE_SECONDS: float = 3600
+
+    # Maximum staleness of user_profiles.last_activity_at; 0 writes through
+    LAST_ACTIVITY_FLUSH_SECONDS: float = 30
+
+    # Background batching of /auth/log-activity; a queue size of 0 writes synchronously
+    ACTIVITY_INGEST_QUEUE_SIZE: int = 10000
+    ACTIVITY_INGEST_BATCH_SIZE: int = 500
+    ACTIVITY_INGEST_FLUSH_SECONDS: float = 1.0
+    ACTIVITY_BATCH_MAX_EVENTS: int = 500
+
+    # Local spool the ingestion writer diverts to while the database is failing or slow ("" disables)
+    ACTIVITY_SPOOL_PATH: str = "spool/activity_events.spool"
+    ACTIVITY_SPOOL_SLOW_WRITE_SECONDS: float = 2.0
+    ACTIVITY_SPOOL_COOLDOWN_SECONDS: float = 30
+    ACTIVITY_SPOOL_REPLAY_SECONDS: float = 10
+
+    # Seconds during which identical (user, type, action, resource) events collapse into one row, per activity_type
+    ACTIVITY_COALESCE_WINDOWS: Dict[str, float] = {}
+
+    # Server-sent activity stream; NOTIFY bridges events persisted by other workers
+    ACTIVITY_STREAM_QUEUE_SIZE: int = 1000
+    ACTIVITY_STREAM_HEARTBEAT_SECONDS: float = 15
+    ACTIVITY_STREAM_NOTIFY: bool = False
+    ACTIVITY_STREAM_CHANNEL: str = "activity_events"
+
+    # Monthly RANGE partitions on activity_logs.created_at (PostgreSQL, new tables only)
+    ACTIVITY_LOG_PARTITIONING: bool = False
+    ACTIVITY_LOG_PARTITION_MONTHS_AHEAD: int = 3
+    ACTIVITY_LOG_MAINTENANCE_SECONDS: float = 6 * 60 * 60
+
+    # Chunked retention job: archive to gzip NDJSON, then delete in committed batches
+    ACTIVITY_RETENTION_DAYS: int = 90
+    ACTIVITY_RETENTION_BATCH_SIZE: int = 5000
+    ACTIVITY_RETENTION_BATCH_SLEEP_SECONDS: float = 0.2
+    ACTIVITY_RETENTION_INTERVAL_SECONDS: float = 0
+    ACTIVITY_ARCHIVE_ENABLED: bool = True
+    ACTIVITY_ARCHIVE_DIR: str = "archive/activity_logs"
+
+    # Hourly activity_rollups maintained on every write; summaries read them instead of raw logs.
+    # Off by default: an existing database must be backfilled (activity_rollups.py backfill) right after enabling
+    ACTIVITY_ROLLUPS_ENABLED: bool = False
+
+    # Per-day HyperLogLog sketches for unique-user counts (~0.81% standard error); 0 disables.
+    # Summaries count exactly over any window with a day that has no sketch: run activity_rollups.py sketches after enabling
+    UNIQUE_USER_SKETCH_FLUSH_SECONDS: float = 0
+
+    # Streaming history export: rows fetched per server-side cursor batch, bytes per response chunk
+    HISTORY_EXPORT_BATCH_SIZE: int = 1000
+    HISTORY_EXPORT_CHUNK_BYTES: int = 64 * 1024
+
     BACKEND_CORS_ORIGINS: list[str] = ["http://localhost:3000", "http://localhost:8080"]
     
     REDIS_URL: str = "redis://localhost:6379"
@@ -0,0 +1,51 @@
+import asyncio
+from typing import Callable, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+
+class PeriodicTask:
+    """
+    Runs a blocking callable in the threadpool every `interval` seconds.
+    Started and stopped from the application lifespan.
+    """
+
+    def __init__(self, name: str, interval: float, func: Callable[[], object]):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self._task: Optional[asyncio.Task] = None
+
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+
+    def start(self):
+        if self.interval > 0 and not self.running:
+            self._task = asyncio.create_task(self._run(), name=self.name)
+
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+    async def run_once(self):
+        try:
+            await run_in_threadpool(self.func)
+        except Exception as e:
+            print(f"⚠️ {self.name} failed: {e}")
+
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.run_once()
\ No newline at end of file
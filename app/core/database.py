@@ -1,25 +1,137 @@
+from typing import Dict, Tuple
+
 from sqlalchemy import create_engine, text
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
+from app.core.pool_metrics import PoolMetrics, InstrumentedQueuePool, InstrumentedAsyncQueuePool
+from app.core.routing import Replica, ReplicaSet, RoutingSession
+
+
+def _engine_options(url: str, async_driver: bool = False) -> dict:
+    """Pool sizing and server-side timeouts from Settings (SQLite keeps its own pool)"""
+    options = {"echo": settings.DEBUG}
+    if url.startswith("sqlite"):
+        return options
+
+    options.update(
+        poolclass = InstrumentedAsyncQueuePool if async_driver else InstrumentedQueuePool,
+        pool_size = settings.DB_POOL_SIZE,
+        max_overflow = settings.DB_MAX_OVERFLOW,
+        pool_timeout = settings.DB_POOL_TIMEOUT,
+        pool_recycle = settings.DB_POOL_RECYCLE,
+        pool_pre_ping = settings.DB_POOL_PRE_PING,
+    )
+
+    if settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        if async_driver:
+            options["connect_args"] = {
+                "server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+            }
+        else:
+            options["connect_args"] = {
+                "options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+            }
+    return options
+
+
+def _attach_pool_metrics(pool):
+    if isinstance(pool, (InstrumentedQueuePool, InstrumentedAsyncQueuePool)):
+        pool.metrics = PoolMetrics()
+
+
+def build_engine(url: str):
+    db_engine = create_engine(url, **_engine_options(url))
+    _attach_pool_metrics(db_engine.pool)
+    return db_engine
+
+
+def build_async_engine(url: str):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    db_engine = create_async_engine(url, **_engine_options(url, async_driver = True))
+    _attach_pool_metrics(db_engine.sync_engine.pool)
+    return db_engine
+
+
+def pool_status(db_engine) -> dict:
+    """Live statistics of an engine's pool: occupancy, overflow, wait times and timeouts"""
+    pool = getattr(db_engine, "sync_engine", db_engine).pool
+    metrics = getattr(pool, "metrics", None)
+    if metrics is None:
+        return {"pool": type(pool).__name__, "status": pool.status()}
+    return {"pool": type(pool).__name__, **metrics.snapshot(pool)}
+
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    echo = settings.DEBUG,
-    pool_pre_ping = True,
-    pool_recycle = 300,
+def _async_database_url(url: str) -> str:
+    """Map a sync driver URL onto its async counterpart"""
+    for prefix, async_prefix in (
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("postgres://", "postgresql+asyncpg://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if url.startswith(prefix):
+            return async_prefix + url[len(prefix):]
+    return url
+
+
+engine = build_engine(settings.DATABASE_URL)
+
+replica_set = ReplicaSet(
+    [
+        Replica(
+            url,
+            build_engine(url),
+            build_async_engine(_async_database_url(url)) if settings.DATABASE_ASYNC else None
+        )
+        for url in settings.DATABASE_REPLICA_URLS
+    ],
+    retry_after = settings.DATABASE_REPLICA_RETRY_SECONDS
 )
 
-SessionLocal = sessionmaker(autocommit = False, autoflush = False, bind = engine)
+SessionLocal = sessionmaker(
+    class_ = RoutingSession,
+    autocommit = False,
+    autoflush = False,
+    bind = engine,
+    info = {"replicas": replica_set},
+)
 Base = declarative_base()
 
 
+async_engine = None
+AsyncSessionLocal = None
+
+if settings.DATABASE_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    async_engine = build_async_engine(
+        settings.ASYNC_DATABASE_URL or _async_database_url(settings.DATABASE_URL)
+    )
+    # Objects must stay readable after commit: lazy refreshes cannot run outside the greenlet
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine,
+        sync_session_class = RoutingSession,
+        autoflush = False,
+        expire_on_commit = False,
+        info = {"replicas": replica_set, "async_driver": True},
+    )
+
+
 
 async def get_db():
     """
     Dependency to get a database session.
     Used with FastAPI Depends().
+    Yields an AsyncSession when DATABASE_ASYNC is enabled.
     """
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+
     db = SessionLocal()
     try:
         yield db
@@ -34,6 +146,135 @@ def create_tables():
 
 
 
+_trigram_support: Dict[str, bool] = {}
+
+
+def _autocommit_connection():
+    """CREATE/DROP INDEX CONCURRENTLY refuse to run inside a transaction block"""
+    return engine.connect().execution_options(isolation_level = "AUTOCOMMIT")
+
+
+def _index_ready(connection, name: str) -> bool:
+    """Whether the index exists and has finished building (a concurrent build leaves it invalid until then)"""
+    return connection.execute(
+        text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+        {"name": name}
+    ).scalar() is True
+
+
+def _create_index(connection, name: str, table: str, definition: str) -> bool:
+    # A partitioned parent cannot be indexed concurrently; its index cascades to every partition instead
+    partitioned = connection.execute(
+        text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": table}
+    ).scalar()
+    concurrently = "" if partitioned else "CONCURRENTLY "
+
+    try:
+        connection.execute(text(f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {table} {definition}"))
+    except DBAPIError as e:
+        # Another worker won the race to create the same relation
+        if not _index_ready(connection, name):
+            print(f"⚠️ Could not create index {name}: {e}")
+            return False
+
+    if not _index_ready(connection, name):
+        print(f"⚠️ Index {name} is not valid yet: still building elsewhere, or left by an interrupted build (drop it to rebuild)")
+        return False
+    return True
+
+
+def create_indexes(indexes: Dict[str, Tuple[str, str]]) -> bool:
+    """
+    Best effort: build indexes that create_all skips because their table already exists.
+    `indexes` maps each name to (table, definition), e.g. ("user_profiles", "(created_at, id)").
+    Each runs CREATE INDEX CONCURRENTLY IF NOT EXISTS in autocommit, so writes keep
+    flowing and workers racing on the same index all end up succeeding.
+    Returns whether every index exists and is valid.
+    """
+    if engine.dialect.name != "postgresql":
+        return False
+
+    ready = True
+    with _autocommit_connection() as connection:
+        for name, (table, definition) in indexes.items():
+            ready = _create_index(connection, name, table, definition) and ready
+    return ready
+
+
+def index_definitions(table) -> Dict[str, Tuple[str, str]]:
+    """The plain column indexes declared on a table, in the shape create_indexes takes"""
+    return {
+        index.name: (table.name, f"({', '.join(column.name for column in index.columns)})")
+        for index in table.indexes
+        if not index.unique
+    }
+
+
+def drop_replaced_indexes(replaced: Dict[str, str]) -> None:
+    """
+    Best effort: drop each old index once the index replacing it exists and is valid.
+    `replaced` maps the old index name to its replacement; anything not ready yet is
+    left in place for the next startup.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+
+    with _autocommit_connection() as connection:
+        for old, replacement in replaced.items():
+            if connection.execute(text("SELECT to_regclass(:name)"), {"name": old}).scalar() is None:
+                continue
+            if not _index_ready(connection, replacement):
+                continue
+            try:
+                connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {old}"))
+            except DBAPIError as e:
+                print(f"⚠️ Could not drop index {old}: {e}")
+
+
+def create_trigram_indexes(indexes: Dict[str, Tuple[str, str]]) -> bool:
+    """
+    Best effort: enable pg_trgm and build the trigram search indexes.
+    Databases without the extension (or a role allowed to create it) keep
+    working; search then falls back to plain ILIKE.
+    """
+    if engine.dialect.name != "postgresql":
+        return False
+
+    try:
+        with _autocommit_connection() as connection:
+            try:
+                connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            except DBAPIError:
+                # Another worker may have created it in the meantime
+                if connection.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first() is None:
+                    raise
+        return create_indexes({
+            name: (table, f"USING gin ({column} gin_trgm_ops)")
+            for name, (table, column) in indexes.items()
+        })
+    except Exception as e:
+        print(f"⚠️ Trigram search unavailable, falling back to ILIKE: {e}")
+        return False
+    finally:
+        _trigram_support.clear()
+
+
+def trigram_available(bind) -> bool:
+    """Whether pg_trgm is installed on the database behind `bind`; checked once per engine"""
+    if bind.dialect.name != "postgresql":
+        return False
+
+    key = str(bind.url)
+    if key not in _trigram_support:
+        with bind.connect() as connection:
+            _trigram_support[key] = connection.execute(
+                text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            ).first() is not None
+    return _trigram_support[key]
+
+
+
 async def check_database_connection():
     """Check that the database connection is working"""
     try:
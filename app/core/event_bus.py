@@ -0,0 +1,88 @@
+import asyncio
+import uuid
+from typing import Any, Dict, List, Optional, Set
+
+
+# Identifies this process in cross-worker notifications, so a worker skips its own
+WORKER_ID = uuid.uuid4().hex
+
+
+class Subscription:
+    """One subscriber's bounded inbox; marked dropped when it falls too far behind"""
+
+    def __init__(self, max_queue: int):
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=max(max_queue, 1))
+        self.dropped = False
+        self.delivered = 0
+
+
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Next event, or None when nothing arrived within the timeout"""
+        try:
+            event = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self.delivered += 1
+        return event
+
+
+class EventBus:
+    """
+    In-process fan-out of events to async subscribers.
+
+    Publishing never blocks: every subscriber has a bounded queue, and one
+    that is full is dropped instead of slowing down the publisher or the
+    other subscribers. Publishers on worker threads go through
+    `publish_threadsafe`, which hands the events to the event loop.
+    """
+
+    def __init__(self, max_queue: int):
+        self.max_queue = max_queue
+        self._subscribers: Set[Subscription] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.published = 0
+        self.dropped = 0
+
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.max_queue)
+        self._subscribers.add(subscription)
+        return subscription
+
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+
+
+    def publish(self, events: List[Dict[str, Any]]):
+        if not events:
+            return
+        self.published += len(events)
+
+        for subscription in list(self._subscribers):
+            for event in events:
+                try:
+                    subscription.queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    subscription.dropped = True
+                    self._subscribers.discard(subscription)
+                    self.dropped += 1
+                    break
+
+
+    def publish_threadsafe(self, events: List[Dict[str, Any]]):
+        if not events or not self._subscribers or self._loop is None or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self.publish, events)
+
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "dropped_subscribers": self.dropped
+        }
\ No newline at end of file
@@ -0,0 +1,102 @@
+import hashlib
+import math
+import zlib
+from typing import Iterable, Optional
+
+
+def standard_error(p: int = 14) -> float:
+    return 1.04 / math.sqrt(1 << p)
+
+
+def _register_max(left: bytes, right: bytes) -> bytes:
+    """
+    Byte-wise max of two register arrays as a handful of big-integer ops.
+    Registers stay below 0x80, so (left | 0x80) - right never borrows
+    across bytes and its top bit is set exactly where left >= right.
+    """
+    size = len(left)
+    high = int.from_bytes(b"\x80" * size, "big")
+    x = int.from_bytes(left, "big")
+    y = int.from_bytes(right, "big")
+    keep_left = ((((x | high) - y) & high) >> 7) * 0xFF
+    return ((x & keep_left) | (y & ~keep_left)).to_bytes(size, "big")
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct counter with 2^p one-byte registers.
+
+    With the default p=14 (16384 registers, 16 KiB) the relative standard
+    error is 1.04 / sqrt(2^p) ~= 0.81%, i.e. within ~1.6% for 95% of
+    estimates. Sketches built with the same p merge losslessly by taking
+    the register-wise maximum, so daily sketches combine into any range.
+    Hashing is a 64-bit blake2b, stable across processes and restarts.
+    """
+
+    def __init__(self, p: int = 14, registers: Optional[bytes] = None):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.m)
+        if len(self.registers) != self.m:
+            raise ValueError(f"Expected {self.m} registers, got {len(self.registers)}")
+
+
+    @property
+    def relative_error(self) -> float:
+        return standard_error(self.p)
+
+
+    def add(self, value) -> bool:
+        """Add a value; returns True if a register changed"""
+        data = value if isinstance(value, bytes) else str(value).encode("utf-8")
+        x = int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+        index = x >> (64 - self.p)
+        remaining = x & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - remaining.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            return True
+        return False
+
+
+    def update(self, values: Iterable):
+        for value in values:
+            self.add(value)
+
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.p != self.p:
+            raise ValueError("Cannot merge sketches with different precision")
+        self.registers = bytearray(_register_max(self.registers, other.registers))
+        return self
+
+
+    @classmethod
+    def union(cls, sketches: Iterable["HyperLogLog"], p: int = 14) -> "HyperLogLog":
+        merged = cls(p)
+        for sketch in sketches:
+            merged.merge(sketch)
+        return merged
+
+
+    def count(self) -> int:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        # Registers hold at most 65 - p distinct values, so sum per value instead of per register
+        harmonic = sum(self.registers.count(rank) * 2.0 ** -rank for rank in range(66 - self.p))
+        estimate = alpha * m * m / harmonic
+
+        # Small-range correction: linear counting while many registers are still empty
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+    def to_bytes(self) -> bytes:
+        return zlib.compress(bytes(self.registers))
+
+
+    @classmethod
+    def from_bytes(cls, data: bytes, p: int = 14) -> "HyperLogLog":
+        return cls(p, zlib.decompress(data))
\ No newline at end of file
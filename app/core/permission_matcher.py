@@ -0,0 +1,89 @@
+from typing import Any, Iterable, Optional
+
+from app.config import settings
+from app.core.cache import TTLCache
+
+
+class _TrieNode:
+    __slots__ = ("children", "wildcard")
+
+    def __init__(self):
+        self.children = {}
+        self.wildcard = False
+
+
+class PermissionMatcher:
+    """
+    Compiled form of a role's permission list.
+
+    Exact permissions live in a hashed set; wildcard permissions such as
+    `admin.*` are stored in a trie of dot-separated segments, so a check
+    costs O(depth of the required permission) instead of O(permissions).
+    `a.b.*` grants every permission starting with `a.b.`.
+    """
+
+    __slots__ = ("_exact", "_root")
+
+    def __init__(self, permissions: Optional[Iterable[str]]):
+        self._exact = set()
+        self._root = _TrieNode()
+
+        for permission in permissions or []:
+            if permission.endswith(".*"):
+                node = self._root
+                for segment in permission[:-2].split("."):
+                    node = node.children.setdefault(segment, _TrieNode())
+                node.wildcard = True
+            else:
+                self._exact.add(permission)
+
+
+    def __bool__(self) -> bool:
+        return bool(self._exact) or bool(self._root.children)
+
+
+    def matches(self, required: str) -> bool:
+        if required in self._exact:
+            return True
+
+        node = self._root
+        segments = required.split(".")
+        for segment in segments[:-1]:
+            node = node.children.get(segment)
+            if node is None:
+                return False
+            if node.wildcard:
+                return True
+        return False
+
+
+    def matches_any(self, required_permissions: Iterable[str]) -> bool:
+        return any(self.matches(required) for required in required_permissions)
+
+
+_role_matchers = TTLCache(
+    max_size=settings.PERMISSION_CACHE_MAX_SIZE,
+    default_ttl=settings.PERMISSION_CACHE_TTL_SECONDS
+)
+
+
+def get_role_matcher(role_id: Any, permissions: Optional[Iterable[str]]) -> PermissionMatcher:
+    """
+    Return the compiled matcher of a role, compiling it on first use.
+    Keyed by the permissions too, so a caller holding a newer permission
+    list never gets a matcher compiled from an older one.
+    """
+    key = (role_id, tuple(permissions or ()))
+    matcher = _role_matchers.get(key)
+    if matcher is None:
+        matcher = PermissionMatcher(key[1])
+        _role_matchers.set(key, matcher)
+    return matcher
+
+
+def invalidate_role_matcher(role_id: Any):
+    _role_matchers.invalidate_where(lambda key, _: key[0] == role_id)
+
+
+def role_matcher_stats() -> dict:
+    return _role_matchers.stats()
\ No newline at end of file
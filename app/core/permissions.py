@@ -3,32 +3,38 @@ from sqlalchemy.orm import Session
 from app.core.security import get_current_user
 from app.api.dependencies import get_database
 from app.api.services.user_service import UserProfileService
+from app.api.services.last_activity_buffer import last_activity_buffer
+from app.core.principals import Principal, principal_cache
 from typing import List
 
 
+async def get_principal(current_user: dict, db: Session) -> Principal:
+    """Read-only authorization lookup; the database is only hit on a cache miss"""
+    principal = principal_cache.get(current_user["sub"])
+    if principal is None:
+        user_service = UserProfileService(db)
+        principal = await user_service.load_principal(current_user)
+        principal_cache.set(current_user["sub"], principal)
+    return principal
+
+
 async def check_permissions(
     required_permissions: List[str],
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_database)
-):
-    user_service = UserProfileService(db)
-    profile = await user_service.get_or_create_user_profile(current_user)
+) -> Principal:
+    principal = await get_principal(current_user, db)
     
-    if not profile.role or not profile.role.permissions:
+    if not principal.matcher:
         raise HTTPException(
             status_code=403, 
             detail="Access denied: No permissions assigned"
         )
     
-    user_permissions = profile.role.permissions
-    
-    for required_perm in required_permissions:
-        for user_perm in user_permissions:
-            if user_perm.endswith('.*'):
-                if required_perm.startswith(user_perm[:-1]):
-                    return profile
-            elif user_perm == required_perm:
-                return profile
+    if principal.matcher.matches_any(required_permissions):
+        if last_activity_buffer.enabled:
+            last_activity_buffer.touch(principal.id)
+        return principal
     
     raise HTTPException(
         status_code=403, 
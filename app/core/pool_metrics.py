@@ -0,0 +1,94 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+
+class PoolMetrics:
+    """Checkout wait-time histogram and timeout counter for one connection pool"""
+
+    BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self._buckets = [0] * (len(self.BUCKETS_MS) + 1)
+
+
+    def observe_wait(self, seconds: float):
+        waited_ms = seconds * 1000
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total_ms += waited_ms
+            self.wait_max_ms = max(self.wait_max_ms, waited_ms)
+            for index, bound in enumerate(self.BUCKETS_MS):
+                if waited_ms <= bound:
+                    self._buckets[index] += 1
+                    break
+            else:
+                self._buckets[-1] += 1
+
+
+    def observe_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+
+    def snapshot(self, pool: Optional[QueuePool] = None) -> Dict[str, Any]:
+        with self._lock:
+            histogram = {f"le_{bound}ms": count for bound, count in zip(self.BUCKETS_MS, self._buckets)}
+            histogram["gt_10000ms"] = self._buckets[-1]
+            stats = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(self.wait_total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.wait_max_ms, 3),
+                "wait_histogram": histogram
+            }
+
+        if pool is not None:
+            stats.update({
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow()
+            })
+        return stats
+
+
+class _InstrumentedPoolMixin:
+    """Times every checkout, including the wait for a free slot and any new connect"""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.observe_timeout()
+            raise
+
+        if self.metrics is not None:
+            self.metrics.observe_wait(time.perf_counter() - started)
+        return connection
+
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
\ No newline at end of file
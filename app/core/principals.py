@@ -0,0 +1,37 @@
+from dataclasses import dataclass
+from typing import Any, Optional, Tuple
+from uuid import UUID
+
+from app.config import settings
+from app.core.cache import TTLCache
+from app.core.permission_matcher import PermissionMatcher, invalidate_role_matcher
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    What authorization needs to know about a caller.
+    `id` is the Supabase user id, like the `id` of the profile schema.
+    """
+    id: str
+    profile_id: UUID
+    role_id: Optional[UUID]
+    role_name: Optional[str]
+    permissions: Tuple[str, ...]
+    matcher: PermissionMatcher
+
+
+principal_cache = TTLCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    default_ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+
+def invalidate_principal(supabase_user_id: str):
+    principal_cache.invalidate(supabase_user_id)
+
+
+def invalidate_role_principals(role_id: Any) -> int:
+    """Drop the compiled matcher of a role and every principal holding it"""
+    invalidate_role_matcher(role_id)
+    return principal_cache.invalidate_where(lambda key, principal: principal.role_id == role_id)
\ No newline at end of file
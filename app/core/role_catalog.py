@@ -0,0 +1,114 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings
+
+
+@dataclass(frozen=True)
+class CatalogRole:
+    """Immutable snapshot of a roles row, safe to share between requests"""
+    id: Any
+    name: str
+    description: Optional[str]
+    permissions: Tuple[str, ...]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+
+    @classmethod
+    def from_role(cls, role) -> "CatalogRole":
+        return cls(
+            id=role.id,
+            name=role.name,
+            description=role.description,
+            permissions=tuple(role.permissions or []),
+            created_at=role.created_at,
+            updated_at=role.updated_at
+        )
+
+
+class RoleCatalog:
+    """
+    Process-wide copy of the roles table, keyed by id and by name.
+
+    Every RoleService mutation bumps `version`; the next read notices the
+    mismatch and reloads the whole (tiny) table in one query. Snapshots
+    also expire after `max_age` seconds so changes made by other workers
+    are picked up.
+    """
+
+    def __init__(self, max_age: float):
+        self.max_age = max_age
+        self.version = 0
+        self.reloads = 0
+        self._loaded_version = -1
+        self._loaded_at = 0.0
+        self._by_id: Dict[Any, CatalogRole] = {}
+        self._by_name: Dict[str, CatalogRole] = {}
+        self._lock = asyncio.Lock()
+
+
+    def bump(self):
+        self.version += 1
+
+
+    @property
+    def fresh(self) -> bool:
+        return self._loaded_version == self.version and time.monotonic() - self._loaded_at < self.max_age
+
+
+    async def refresh(self, role_repo, stale: Optional[Dict[Any, CatalogRole]] = None):
+        """
+        Reload from the database if stale, or while the snapshot is still `stale`;
+        concurrent callers share one reload
+        """
+        if self.fresh and self._by_id is not stale:
+            return
+        async with self._lock:
+            if self.fresh and self._by_id is not stale:
+                return
+            version = self.version
+            roles = [CatalogRole.from_role(role) for role in await role_repo.get_all_roles()]
+            self._by_id = {role.id: role for role in roles}
+            self._by_name = {role.name: role for role in roles}
+            self._loaded_version = version
+            self._loaded_at = time.monotonic()
+            self.reloads += 1
+
+
+    async def get(self, role_repo, role_id: Any) -> Optional[CatalogRole]:
+        if role_id is None:
+            return None
+        await self.refresh(role_repo)
+        snapshot = self._by_id
+        role = snapshot.get(role_id)
+        if role is None:
+            # A role created by another worker (or make_admin.py) can be assigned before the snapshot expires
+            await self.refresh(role_repo, stale=snapshot)
+            role = self._by_id.get(role_id)
+        return role
+
+
+    async def get_by_name(self, role_repo, name: str) -> Optional[CatalogRole]:
+        await self.refresh(role_repo)
+        return self._by_name.get(name)
+
+
+    async def all(self, role_repo) -> List[CatalogRole]:
+        await self.refresh(role_repo)
+        return sorted(self._by_id.values(), key=lambda role: role.name)
+
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "roles": len(self._by_id),
+            "version": self.version,
+            "fresh": self.fresh,
+            "reloads": self.reloads
+        }
+
+
+role_catalog = RoleCatalog(settings.ROLE_CATALOG_MAX_AGE_SECONDS)
\ No newline at end of file
@@ -0,0 +1,127 @@
+import itertools
+import threading
+import time
+from typing import Any, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+
+class Replica:
+    """A read replica: its sync engine, its async engine when enabled, and health state"""
+
+    def __init__(self, url: str, engine, async_engine=None):
+        self.url = url
+        self.engine = engine
+        self.async_engine = async_engine
+        self.down_until = 0.0
+        self.failures = 0
+
+
+    @property
+    def healthy(self) -> bool:
+        return self.down_until <= time.monotonic()
+
+
+class ReplicaSet:
+    """
+    Round-robin over read replicas.
+    A replica that fails (connection error or failed probe) is skipped for
+    `retry_after` seconds; with no healthy replica reads go to the primary.
+    """
+
+    def __init__(self, replicas: List[Replica], retry_after: float):
+        self.replicas = replicas
+        self.retry_after = retry_after
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+        for replica in replicas:
+            self._watch(replica, replica.engine)
+            if replica.async_engine is not None:
+                self._watch(replica, replica.async_engine.sync_engine)
+
+
+    def _watch(self, replica: Replica, db_engine):
+        """Passive health check: connection failures take the replica out of rotation"""
+        @event.listens_for(db_engine, "handle_error")
+        def _on_error(context):
+            if context.is_disconnect or context.connection is None:
+                self.mark_down(replica)
+
+
+    def choose(self) -> Optional[Replica]:
+        if not self.replicas:
+            return None
+
+        start = next(self._counter)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            if replica.healthy:
+                return replica
+        return None
+
+
+    def mark_down(self, replica: Replica):
+        with self._lock:
+            replica.failures += 1
+            replica.down_until = time.monotonic() + self.retry_after
+
+
+    def probe(self):
+        """Actively check every replica with SELECT 1"""
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as connection:
+                    connection.execute(text("SELECT 1"))
+                replica.down_until = 0.0
+            except Exception:
+                self.mark_down(replica)
+
+
+    def status(self) -> List[dict]:
+        return [
+            {
+                "url": replica.engine.url.render_as_string(hide_password=True),
+                "healthy": replica.healthy,
+                "failures": replica.failures
+            }
+            for replica in self.replicas
+        ]
+
+
+class RoutingSession(Session):
+    """
+    Sends reads issued inside `replica_read` repository methods to a replica.
+
+    Everything else stays on the primary: flushes, INSERT/UPDATE/DELETE
+    statements, and every read issued after the session has written, so
+    read-after-write paths never observe replication lag.
+    """
+
+    def get_bind(self, mapper: Any = None, clause: Any = None, **kw):
+        if getattr(clause, "is_dml", False):
+            self.info["wrote"] = True
+        elif self.info.get("use_replica") and not self.info.get("wrote") and not self._flushing:
+            replica = self._pinned_replica()
+            if replica is not None:
+                if self.info.get("async_driver"):
+                    return replica.async_engine.sync_engine
+                return replica.engine
+
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+    def _pinned_replica(self) -> Optional[Replica]:
+        """One replica per session, so a request reads from a single snapshot source"""
+        replica = self.info.get("replica")
+        if replica is None or not replica.healthy:
+            replica_set: Optional[ReplicaSet] = self.info.get("replicas")
+            replica = replica_set.choose() if replica_set else None
+            self.info["replica"] = replica
+        return replica
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_session_written(session, flush_context):
+    session.info["wrote"] = True
\ No newline at end of file
@@ -1,7 +1,16 @@
+import asyncio
+import hashlib
+import time
+from typing import Optional, Dict, Any
+
+import httpx
 from fastapi import Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from jose import jwt, JWTError
 from supabase import create_client, Client
 from app.config import settings
+from app.core.cache import TTLCache
 
 security = HTTPBearer()
 
@@ -10,21 +19,177 @@ supabase: Client = create_client(
     settings.SUPABASE_ANON_KEY
 )
 
+
+class SigningKeyUnavailable(Exception):
+    """Raised when no key is available to verify a token locally"""
+
+
+class JWKSCache:
+    """
+    Caches the signing keys published by Supabase.
+    Keys are refetched when the TTL expires or when a token carries an
+    unknown `kid` (key rotation), but never more often than the minimum
+    refresh interval.
+    """
+
+    def __init__(self, url: str, ttl_seconds: int, min_refresh_interval: int):
+        self.url = url
+        self.ttl_seconds = ttl_seconds
+        self.min_refresh_interval = min_refresh_interval
+        self._keys: Dict[str, dict] = {}
+        self._fetched_at = 0.0
+        self._attempted_at = 0.0
+        self._lock = asyncio.Lock()
+
+
+    async def get_key(self, kid: Optional[str]) -> dict:
+        expired = time.monotonic() - self._fetched_at > self.ttl_seconds
+        if expired or kid not in self._keys:
+            await self._refresh()
+
+        key = self._keys.get(kid)
+        if key is None and kid is None and len(self._keys) == 1:
+            key = next(iter(self._keys.values()))
+        if key is None:
+            raise SigningKeyUnavailable(f"Unknown signing key: {kid}")
+        return key
+
+
+    async def _refresh(self):
+        async with self._lock:
+            now = time.monotonic()
+            if self._keys and now - self._attempted_at < self.min_refresh_interval:
+                return
+            self._attempted_at = now
+            try:
+                async with httpx.AsyncClient(timeout=5.0) as client:
+                    response = await client.get(self.url)
+                    response.raise_for_status()
+                    keys = response.json().get("keys", [])
+            except Exception as e:
+                if not self._keys:
+                    raise SigningKeyUnavailable(f"Could not fetch JWKS: {str(e)}")
+                return
+            self._keys = {key.get("kid"): key for key in keys}
+            self._fetched_at = time.monotonic()
+
+
+token_cache = TTLCache(
+    max_size=settings.TOKEN_CACHE_MAX_SIZE,
+    default_ttl=settings.TOKEN_CACHE_TTL_SECONDS
+)
+
+
+def _token_cache_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _token_cache_ttl(token: str) -> float:
+    """Never keep a token past its own `exp`"""
+    try:
+        exp = jwt.get_unverified_claims(token).get("exp")
+    except JWTError:
+        return 0
+    if exp is None:
+        return 0
+    return min(settings.TOKEN_CACHE_TTL_SECONDS, exp - time.time())
+
+
+def forget_user_tokens(supabase_user_id: str) -> int:
+    """
+    Drop every cached token of a user so the next request is re-validated.
+    This revokes nothing: a JWT that is still valid verifies again until its exp.
+    """
+    return token_cache.invalidate_where(lambda key, user: user["sub"] == supabase_user_id)
+
+
+jwks_cache = JWKSCache(
+    settings.JWKS_URL or f"https://{settings.SUPABASE_PROJECT_ID}/auth/v1/.well-known/jwks.json",
+    settings.JWKS_CACHE_TTL_SECONDS,
+    settings.JWKS_MIN_REFRESH_INTERVAL_SECONDS
+)
+
+
+def _build_user_claims(sub: str, email: Optional[str], user_metadata: Any, app_metadata: Any) -> dict:
+    return {
+        "sub": sub,
+        "email": email,
+        "user_metadata": user_metadata or {},
+        "app_metadata": app_metadata or {}
+    }
+
+
+async def verify_token_locally(token: str) -> dict:
+    """Verify signature, expiry and audience without calling Supabase"""
+    if settings.ALGORITHM.startswith("HS"):
+        if not settings.SECRET_KEY:
+            raise SigningKeyUnavailable("SECRET_KEY is not configured")
+        key = settings.SECRET_KEY
+    else:
+        header = jwt.get_unverified_header(token)
+        key = await jwks_cache.get_key(header.get("kid"))
+
+    claims = jwt.decode(
+        token,
+        key,
+        algorithms=[settings.ALGORITHM],
+        audience=settings.JWT_AUDIENCE,
+        options={
+            "verify_aud": settings.JWT_AUDIENCE is not None,
+            "require_exp": True,
+            "require_sub": True,
+            "leeway": settings.JWT_LEEWAY_SECONDS
+        }
+    )
+
+    return _build_user_claims(
+        claims["sub"],
+        claims.get("email"),
+        claims.get("user_metadata"),
+        claims.get("app_metadata")
+    )
+
+
+async def verify_token_remotely(token: str) -> dict:
+    """Validate the token against the Supabase auth API"""
+    user = await run_in_threadpool(supabase.auth.get_user, token)
+
+    if not user or not user.user:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    return _build_user_claims(
+        user.user.id,
+        user.user.email,
+        user.user.user_metadata,
+        user.user.app_metadata
+    )
+
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
-    
+    cache_key = _token_cache_key(token)
+
+    cached_user = token_cache.get(cache_key)
+    if cached_user is not None:
+        return cached_user
+
     try:
-        user = supabase.auth.get_user(token)
-        
-        if not user.user:
-            raise HTTPException(status_code=401, detail="Invalid token")
-            
-        return {
-            "sub": user.user.id,
-            "email": user.user.email,
-            "user_metadata": user.user.user_metadata,
-            "app_metadata": user.user.app_metadata
-        }
-        
+        if settings.AUTH_VERIFICATION_MODE == "remote":
+            user = await verify_token_remotely(token)
+        else:
+            try:
+                user = await verify_token_locally(token)
+            except SigningKeyUnavailable:
+                if not settings.AUTH_REMOTE_FALLBACK:
+                    raise
+                user = await verify_token_remotely(token)
+
+    except HTTPException:
+        raise
+    except JWTError as e:
+        raise HTTPException(status_code=401, detail=f"Invalid token: {str(e)}")
     except Exception as e:
-        raise HTTPException(status_code=401, detail=f"Token validation failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=401, detail=f"Token validation failed: {str(e)}")
+
+    token_cache.set(cache_key, user, ttl=_token_cache_ttl(token))
+    return user
\ No newline at end of file
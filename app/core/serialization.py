@@ -0,0 +1,12 @@
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+
+def json_default(value: Any):
+    """`default=` hook for json.dumps covering the non-JSON types found in rows"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
\ No newline at end of file
@@ -0,0 +1,157 @@
+import fcntl
+import os
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+
+class Spool:
+    """
+    Crash-safe append-only record file.
+
+    Each record is framed as <length:u32><crc32:u32><payload>. A batch of
+    records is written with one fsync, and a torn or corrupt tail left by a
+    crash is detected on read and ignored. Readers never consume the live
+    file: `claim` renames it aside first, so appends continue into a fresh
+    file while the claimed one is replayed and finally discarded.
+
+    Every worker process may share one path: appends and claims take an
+    flock on `<path>.lock`, and only one process at a time holds the
+    replay claim.
+    """
+
+    HEADER = struct.Struct(">II")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.claimed_path = f"{path}.replaying"
+        self._lock = threading.Lock()
+        self._replay_lock_file = None
+        self._tail_checked = False
+        self.appended = 0
+        self.truncated_bytes = 0
+
+
+    @contextmanager
+    def _locked(self):
+        """Excludes other threads and other processes spooling to the same path"""
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(f"{self.path}.lock", "ab") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                yield
+
+
+    def append(self, records: List[bytes]):
+        if not records:
+            return
+
+        frames = b"".join(self.HEADER.pack(len(record), zlib.crc32(record)) + record for record in records)
+        with self._locked():
+            if not self._tail_checked:
+                self._truncate_torn_tail()
+                self._tail_checked = True
+            with open(self.path, "ab") as spool_file:
+                spool_file.write(frames)
+                spool_file.flush()
+                os.fsync(spool_file.fileno())
+            self.appended += len(records)
+
+
+    def claim(self) -> Optional[str]:
+        """
+        Move the live file aside for replay; an unfinished earlier claim is
+        returned first. Returns None while another process is replaying.
+        """
+        with self._locked():
+            if self._replay_lock_file is None:
+                replay_lock = open(f"{self.claimed_path}.lock", "ab")
+                try:
+                    fcntl.flock(replay_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    replay_lock.close()
+                    return None
+                self._replay_lock_file = replay_lock
+
+            if os.path.exists(self.claimed_path):
+                return self.claimed_path
+            if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+                self._release_replay_lock()
+                return None
+            os.replace(self.path, self.claimed_path)
+            return self.claimed_path
+
+
+    def _truncate_torn_tail(self):
+        """Cut a frame left half-written by a crash, so new records are not appended behind it"""
+        if not os.path.exists(self.path):
+            return
+        valid = self.valid_length(self.path)
+        size = os.path.getsize(self.path)
+        if valid < size:
+            with open(self.path, "r+b") as spool_file:
+                spool_file.truncate(valid)
+                os.fsync(spool_file.fileno())
+            self.truncated_bytes += size - valid
+            print(f"⚠️ Truncated {size - valid} bytes of torn spool tail in {self.path}")
+
+
+    def quarantine(self, claimed_path: str) -> str:
+        """Move a claimed file with unreadable bytes aside instead of discarding it"""
+        quarantined_path = f"{claimed_path}.corrupt-{int(time.time())}"
+        os.replace(claimed_path, quarantined_path)
+        with self._lock:
+            self._release_replay_lock()
+        return quarantined_path
+
+
+    def release(self, claimed_path: str):
+        """Discard a claimed file once every record in it has been replayed"""
+        try:
+            os.remove(claimed_path)
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            self._release_replay_lock()
+
+
+    def _release_replay_lock(self):
+        if self._replay_lock_file is not None:
+            self._replay_lock_file.close()
+            self._replay_lock_file = None
+
+
+    def pending_bytes(self) -> int:
+        total = 0
+        for path in (self.path, self.claimed_path):
+            if os.path.exists(path):
+                total += os.path.getsize(path)
+        return total
+
+
+    @classmethod
+    def valid_length(cls, path: str) -> int:
+        """Offset just past the last intact frame"""
+        offset = 0
+        for record in cls.read(path):
+            offset += cls.HEADER.size + len(record)
+        return offset
+
+
+    @classmethod
+    def read(cls, path: str) -> Iterator[bytes]:
+        with open(path, "rb") as spool_file:
+            while True:
+                header = spool_file.read(cls.HEADER.size)
+                if len(header) < cls.HEADER.size:
+                    return
+                length, checksum = cls.HEADER.unpack(header)
+                record = spool_file.read(length)
+                if len(record) < length or zlib.crc32(record) != checksum:
+                    return
+                yield record
\ No newline at end of file
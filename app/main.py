@@ -1,10 +1,25 @@
+import asyncio
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.api.v1.router import api_router
 from app.config import settings
-from app.core.database import check_database_connection, create_tables, SessionLocal
+from app.core.database import check_database_connection, create_tables, create_indexes, drop_replaced_indexes, create_trigram_indexes, SessionLocal, replica_set
+from app.api.models.activity_log import ACTIVITY_LOG_INDEXES, REPLACED_ACTIVITY_LOG_INDEXES
+from app.api.models.user import TRIGRAM_INDEXES, USER_PROFILE_INDEXES
+from app.core.background import PeriodicTask
 from app.api.services.user_service import UserProfileService
+from app.api.services.last_activity_buffer import last_activity_buffer
+from app.api.services.activity_ingestion import activity_ingestion
+from app.api.services.activity_maintenance import partition_maintenance
+from app.api.services.role_maintenance import role_count_reconcile
+from app.api.services.activity_retention import activity_retention
+from app.api.services.activity_stream import activity_bus, notify_listener
+from app.api.services.unique_users import unique_user_sketches
+
+
+replica_probe = PeriodicTask("replica probe", settings.DATABASE_REPLICA_PROBE_SECONDS, replica_set.probe)
 
 
 @asynccontextmanager
@@ -12,6 +27,8 @@ async def lifespan(app: FastAPI):
     print(f"🚀 Starting {settings.PROJECT_NAME} v{settings.VERSION}")
     print(f"🌍 Environment: {settings.ENVIRONMENT}")
     
+    activity_bus.bind(asyncio.get_running_loop())
+    
     db_connected = await check_database_connection()
     if db_connected:
         print("✅ Database connection successful")
@@ -20,6 +37,18 @@ async def lifespan(app: FastAPI):
         create_tables()
         print("✅ Database tables ready")
         
+        if create_indexes({**ACTIVITY_LOG_INDEXES, **USER_PROFILE_INDEXES}):
+            print("🗃️ Keyset pagination indexes ready")
+        drop_replaced_indexes(REPLACED_ACTIVITY_LOG_INDEXES)
+        
+        if create_trigram_indexes(TRIGRAM_INDEXES):
+            print("🔎 Trigram search indexes ready")
+        
+        if settings.ACTIVITY_LOG_PARTITIONING:
+            await partition_maintenance.run_once()
+            partition_maintenance.start()
+            print("🗂️ Activity log partitions ready")
+        
         print("👥 Initializing default roles...")
         db = SessionLocal()
         try:
@@ -30,6 +59,22 @@ async def lifespan(app: FastAPI):
             print(f"⚠️ Error initializing roles: {e}")
         finally:
             db.close()
+
+        # Also backfills the counters on databases that predate roles.users_count
+        await role_count_reconcile.run_once()
+        role_count_reconcile.start()
+
+        last_activity_buffer.start()
+        unique_user_sketches.start()
+        activity_ingestion.start()
+        activity_retention.start_schedule()
+        if settings.ACTIVITY_STREAM_NOTIFY:
+            notify_listener.start()
+
+        if replica_set.replicas:
+            await replica_probe.run_once()
+            replica_probe.start()
+            print(f"📚 Read replicas: {sum(r.healthy for r in replica_set.replicas)}/{len(replica_set.replicas)} healthy")
             
     else:
         print("❌ Database connection failed")
@@ -37,6 +82,23 @@ async def lifespan(app: FastAPI):
     yield
     
     print("Shutting down...")
+    await replica_probe.stop()
+    await partition_maintenance.stop()
+    await role_count_reconcile.stop()
+    await activity_retention.stop()
+    await run_in_threadpool(notify_listener.stop)
+    try:
+        await activity_ingestion.stop()
+    except Exception as e:
+        print(f"⚠️ Error draining activity ingestion: {e}")
+    try:
+        await last_activity_buffer.stop()
+    except Exception as e:
+        print(f"⚠️ Error flushing last activity updates: {e}")
+    try:
+        await unique_user_sketches.stop()
+    except Exception as e:
+        print(f"⚠️ Error flushing unique user sketches: {e}")
 
 app = FastAPI(
     title = settings.PROJECT_NAME,
@@ -0,0 +1,84 @@
+"""
+Uso:
+    python scripts/benchmark_permission_matcher.py [--exact N] [--wildcards N] [--checks N]
+
+Compara el bucle original de check_permissions (permisos requeridos × permisos
+del rol, con comodines 'x.y.*') con PermissionMatcher sobre un rol grande.
+Mide el peor caso: un permiso que el rol no concede, que recorre la lista entera.
+
+Ejemplo:
+    python scripts/benchmark_permission_matcher.py --exact 400 --wildcards 10
+
+Resultados (400 exactos + 10 comodines, 20.000 comprobaciones, dos ejecuciones):
+    bucle original:     67-77 µs por comprobación
+    PermissionMatcher:  1.5-1.9 µs por comprobación (40-44× más rápido)
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+# Settings se leen al importar; el benchmark no necesita .env
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.core.permission_matcher import PermissionMatcher
+
+
+def legacy_matches_any(required_permissions, user_permissions) -> bool:
+    """El bucle de check_permissions anterior al matcher compilado"""
+    for required_perm in required_permissions:
+        for user_perm in user_permissions:
+            if user_perm.endswith('.*'):
+                if required_perm.startswith(user_perm[:-1]):
+                    return True
+            elif user_perm == required_perm:
+                return True
+    return False
+
+
+def role_permissions(exact: int, wildcards: int) -> list:
+    permissions = [f"module{index // 10}.resource{index % 10}.read" for index in range(exact)]
+    permissions += [f"area{index}.*" for index in range(wildcards)]
+    return permissions
+
+
+def per_check_microseconds(check, checks: int) -> float:
+    started = time.perf_counter()
+    for _ in range(checks):
+        check()
+    return (time.perf_counter() - started) / checks * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de PermissionMatcher")
+    parser.add_argument("--exact", type=int, default=400, help="Permisos exactos del rol (por defecto 400)")
+    parser.add_argument("--wildcards", type=int, default=10, help="Permisos comodín del rol (por defecto 10)")
+    parser.add_argument("--checks", type=int, default=20000, help="Comprobaciones por medición (por defecto 20.000)")
+    args = parser.parse_args()
+
+    permissions = role_permissions(args.exact, args.wildcards)
+    matcher = PermissionMatcher(permissions)
+    required = ["billing.invoices.delete"]
+
+    # Ambos deben decidir lo mismo antes de comparar tiempos
+    for probe in (required, [permissions[0]], ["area3.anything.read"]):
+        assert legacy_matches_any(probe, permissions) == matcher.matches_any(probe)
+
+    legacy = per_check_microseconds(lambda: legacy_matches_any(required, permissions), args.checks)
+    compiled = per_check_microseconds(lambda: matcher.matches_any(required), args.checks)
+
+    print("="*60)
+    print(f"🔐 {len(permissions)} permisos, peor caso (permiso no concedido)")
+    print("-"*60)
+    print(f"bucle original:     {legacy:.2f} µs por comprobación")
+    print(f"PermissionMatcher:  {compiled:.2f} µs por comprobación ({legacy / compiled:.0f}× más rápido)")
+    print("="*60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+import os
+
+# Settings are read at import time; tests build their own engines and never reach Supabase
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SUPABASE_PROJECT_ID", "test.supabase.co")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-anon-key")
\ No newline at end of file
@@ -0,0 +1,38 @@
+import json
+import uuid
+from datetime import datetime
+
+from app.api.services.activity_stream import NOTIFY_PAYLOAD_LIMIT, activity_event, notify_payloads
+
+
+def _row(description: str):
+    return {
+        "id": uuid.uuid4(),
+        "user_id": uuid.uuid4(),
+        "activity_type": "profile",
+        "action": "update",
+        "description": description,
+        "resource_type": None,
+        "resource_id": None,
+        "created_at": datetime.utcnow()
+    }
+
+
+def test_payloads_stay_under_limit():
+    rows = [_row("x" * 500) for _ in range(100)]
+    payloads = notify_payloads([activity_event(row) for row in rows])
+
+    assert len(payloads) > 1
+    assert all(len(payload.encode()) < NOTIFY_PAYLOAD_LIMIT for payload in payloads)
+    assert sum(len(json.loads(payload)["events"]) for payload in payloads) == len(rows)
+
+
+def test_oversized_event_is_truncated():
+    row = _row("é" * 20000)
+    [payload] = notify_payloads([activity_event(row)])
+    [event] = json.loads(payload)["events"]
+
+    assert len(payload.encode()) < NOTIFY_PAYLOAD_LIMIT
+    assert event["id"] == str(row["id"])
+    assert event["description"] is None
+    assert event["truncated"] is True
\ No newline at end of file
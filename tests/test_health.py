@@ -0,0 +1,16 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.health import router
+
+
+@pytest.mark.parametrize("path", ["/health/db/pool", "/health/db/replicas", "/health/cache", "/health/ingestion"])
+def test_internals_require_authentication(path):
+    app = FastAPI()
+    app.include_router(router, prefix = "/health")
+
+    response = TestClient(app).get(path)
+
+    assert response.status_code in (401, 403)
+    assert "url" not in response.text
\ No newline at end of file
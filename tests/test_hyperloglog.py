@@ -0,0 +1,38 @@
+import random
+
+from app.core.hyperloglog import HyperLogLog, standard_error
+
+
+def _sketch(values):
+    sketch = HyperLogLog()
+    sketch.update(values)
+    return sketch
+
+
+def test_merge_is_registerwise_max():
+    rng = random.Random(7)
+    sketches = [_sketch(rng.getrandbits(48) for _ in range(rng.choice([5, 500, 20000]))) for _ in range(8)]
+
+    merged = HyperLogLog.union(sketches)
+
+    assert merged.registers == bytearray(map(max, *[sketch.registers for sketch in sketches]))
+
+
+def test_union_estimates_overlapping_days():
+    days = [_sketch(f"user-{index}" for index in range(day * 1000, day * 1000 + 5000)) for day in range(30)]
+
+    estimate = HyperLogLog.union(days).count()
+
+    assert abs(estimate - 34000) <= 34000 * 4 * standard_error()
+
+def test_windows_with_unsketched_days_are_not_covered():
+    from datetime import date, datetime
+
+    from app.api.services.unique_users import UniqueUserSketches
+
+    sketches = UniqueUserSketches(flush_interval=10)
+    stored = {date(2026, 1, 1): _sketch(["a"]), date(2026, 1, 2): _sketch(["b"])}
+    sketches.add([{"created_at": datetime(2026, 1, 3, 12), "user_id": "c"}])
+
+    assert sketches.covers(stored, date(2026, 1, 1), date(2026, 1, 3))
+    assert not sketches.covers(stored, date(2025, 12, 31), date(2026, 1, 3))
@@ -0,0 +1,53 @@
+import random
+
+from app.core.permission_matcher import PermissionMatcher, get_role_matcher, invalidate_role_matcher
+
+
+def _legacy_matches(user_permissions, required_permissions):
+    """The nested loop check_permissions used before permissions were compiled"""
+    for required_perm in required_permissions:
+        for user_perm in user_permissions:
+            if user_perm.endswith('.*'):
+                if required_perm.startswith(user_perm[:-1]):
+                    return True
+            elif user_perm == required_perm:
+                return True
+    return False
+
+
+SEGMENTS = ["admin", "users", "read", "update", "roles", "profile", "*", ""]
+
+
+def _permission(rng):
+    return ".".join(rng.choice(SEGMENTS) for _ in range(rng.randint(1, 4)))
+
+
+def test_matches_legacy_loop():
+    rng = random.Random(1234)
+    for _ in range(2000):
+        granted = [_permission(rng) for _ in range(rng.randint(0, 6))]
+        required = [_permission(rng) for _ in range(rng.randint(1, 3))]
+
+        assert PermissionMatcher(granted).matches_any(required) == _legacy_matches(granted, required), (granted, required)
+
+
+def test_wildcards():
+    matcher = PermissionMatcher(["admin.*", "reports.daily.*", "profile.read"])
+
+    assert matcher.matches("admin.users.delete")
+    assert matcher.matches("reports.daily.export")
+    assert matcher.matches("profile.read")
+    assert not matcher.matches("admin")
+    assert not matcher.matches("reports.weekly.export")
+    assert not matcher.matches("profile.update")
+
+
+def test_role_matcher_follows_permission_changes():
+    role_id = "role-under-test"
+    assert get_role_matcher(role_id, ["users.read", "users.delete"]).matches("users.delete")
+
+    # Another worker revoked users.delete; the principal carries the new list before any invalidation
+    assert not get_role_matcher(role_id, ["users.read"]).matches("users.delete")
+
+    invalidate_role_matcher(role_id)
+    assert get_role_matcher(role_id, ["users.read"]).matches("users.read")
\ No newline at end of file
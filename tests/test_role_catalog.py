@@ -0,0 +1,40 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+from app.core.role_catalog import RoleCatalog
+
+
+class _Roles:
+    def __init__(self):
+        self.roles = []
+        self.loads = 0
+
+    async def get_all_roles(self):
+        self.loads += 1
+        return list(self.roles)
+
+
+def _role(name: str):
+    return SimpleNamespace(id=uuid.uuid4(), name=name, description=None, permissions=[], created_at=None, updated_at=None)
+
+
+def test_unknown_role_id_forces_one_reload():
+    catalog = RoleCatalog(max_age=60)
+    repo = _Roles()
+    repo.roles.append(_role("user"))
+
+    async def scenario():
+        await catalog.all(repo)
+        # Created elsewhere after this worker took its snapshot
+        admin = _role("admin")
+        repo.roles.append(admin)
+        found = await catalog.get(repo, admin.id)
+        missing = await catalog.get(repo, uuid.uuid4())
+        return admin, found, missing
+
+    admin, found, missing = asyncio.run(scenario())
+
+    assert found.name == "admin"
+    assert missing is None
+    assert repo.loads == 3
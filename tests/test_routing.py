@@ -0,0 +1,101 @@
+import pytest
+from sqlalchemy import Column, Integer, String, create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from app.core.routing import Replica, ReplicaSet, RoutingSession
+from app.api.repositories.base import replica_read
+
+
+Base = declarative_base()
+
+
+class Item(Base):
+    __tablename__ = "items"
+
+    id = Column(Integer, primary_key = True)
+    name = Column(String(50), nullable = False)
+
+
+class ItemRepository:
+    def __init__(self, db):
+        self.db = db
+
+
+    def get_names(self):
+        return [item.name for item in self.db.query(Item).order_by(Item.id)]
+
+
+    @replica_read
+    def get_names_from_replica(self):
+        return self.get_names()
+
+
+def _database(path, name):
+    db_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(db_engine)
+    with sessionmaker(bind = db_engine)() as db:
+        db.add(Item(name = name))
+        db.commit()
+    return db_engine
+
+
+@pytest.fixture
+def primary(tmp_path):
+    return _database(tmp_path / "primary.db", "primary")
+
+
+@pytest.fixture
+def replica(tmp_path):
+    return _database(tmp_path / "replica.db", "replica")
+
+
+def _session(primary, *replicas):
+    replica_set = ReplicaSet([Replica(str(db_engine.url), db_engine) for db_engine in replicas], retry_after = 30)
+    return sessionmaker(class_ = RoutingSession, bind = primary, info = {"replicas": replica_set})()
+
+
+def test_replica_read_goes_to_replica(primary, replica):
+    repo = ItemRepository(_session(primary, replica))
+
+    assert repo.get_names_from_replica() == ["replica"]
+    assert repo.get_names() == ["primary"]
+
+
+def test_writes_go_to_primary(primary, replica):
+    db = _session(primary, replica)
+    db.add(Item(name = "written"))
+    db.commit()
+
+    assert ItemRepository(_session(primary)).get_names() == ["primary", "written"]
+    assert ItemRepository(_session(replica)).get_names() == ["replica"]
+
+
+def test_reads_after_write_stay_on_primary(primary, replica):
+    db = _session(primary, replica)
+    db.add(Item(name = "written"))
+    db.flush()
+
+    assert ItemRepository(db).get_names_from_replica() == ["primary", "written"]
+
+
+def test_unreachable_replica_falls_back_to_primary(primary, tmp_path):
+    dead = create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    db = _session(primary, dead)
+
+    assert ItemRepository(db).get_names_from_replica() == ["primary"]
+    assert not db.info["replicas"].replicas[0].healthy
+
+def test_unreachable_replica_keeps_unflushed_changes(primary, tmp_path):
+    dead = create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    db = _session(primary, dead)
+    # As SessionLocal is configured: nothing is flushed before the read, so it is routed to the replica
+    db.autoflush = False
+    pending = Item(name = "pending")
+    db.add(pending)
+
+    with pytest.raises(OperationalError):
+        ItemRepository(db).get_names_from_replica()
+
+    assert pending in db.new
+    assert not db.info["replicas"].replicas[0].healthy
@@ -0,0 +1,107 @@
+import multiprocessing
+import os
+
+from app.core.spool import Spool
+
+
+def _append_many(path: str, worker: int):
+    spool = Spool(path)
+    for batch in range(50):
+        spool.append([f"{worker}:{batch}:{index}".encode() * 20 for index in range(10)])
+
+
+def test_concurrent_processes_keep_framing_intact(tmp_path):
+    path = str(tmp_path / "events.spool")
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_append_many, args=(path, worker)) for worker in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+
+    assert len(list(Spool.read(path))) == 4 * 50 * 10
+
+
+def test_only_one_worker_claims_for_replay(tmp_path):
+    path = str(tmp_path / "events.spool")
+    first, second = Spool(path), Spool(path)
+    first.append([b"event"])
+
+    claimed_path = first.claim()
+    assert claimed_path is not None
+    assert second.claim() is None
+
+    first.release(claimed_path)
+    first.release(claimed_path)
+    second.append([b"later"])
+    assert list(Spool.read(second.claim())) == [b"later"]
+
+def _tear(path: str):
+    """Leave a frame whose header promises more bytes than were written, as a crash mid-append would"""
+    with open(path, "ab") as spool_file:
+        spool_file.write(Spool.HEADER.pack(100, 0) + b"partial")
+
+
+def test_torn_tail_is_truncated_before_next_append(tmp_path):
+    path = str(tmp_path / "events.spool")
+    Spool(path).append([b"a", b"b"])
+    _tear(path)
+
+    restarted = Spool(path)
+    restarted.append([b"c", b"d"])
+
+    assert list(Spool.read(path)) == [b"a", b"b", b"c", b"d"]
+    assert restarted.truncated_bytes == Spool.HEADER.size + len(b"partial")
+
+
+def test_replay_keeps_file_with_unreadable_records(tmp_path, monkeypatch):
+    from app.api.services.activity_ingestion import ActivityIngestionQueue, _encode_event
+
+    path = str(tmp_path / "events.spool")
+    spool = Spool(path)
+    spool.append([_encode_event({"id": None, "created_at": "2026-01-01T00:00:00"}, "user")])
+    # Torn by another process after this one already checked the tail
+    _tear(path)
+
+    queue = ActivityIngestionQueue(10, 10, 0.1, spool=spool)
+    written = []
+    monkeypatch.setattr(queue, "_write_batch", lambda batch, skip_existing=False: written.extend(batch) or [])
+
+    assert queue.replay_spool() == 1
+    assert len(written) == 1
+    assert [name for name in os.listdir(tmp_path) if ".corrupt-" in name]
+    assert spool.claim() is None
+
+def test_coalesced_events_are_spooled_when_stopped_without_writer(tmp_path):
+    import asyncio
+    import uuid
+    from datetime import datetime
+    from app.api.services.activity_ingestion import ActivityIngestionQueue, _decode_event
+
+    spool = Spool(str(tmp_path / "events.spool"))
+    queue = ActivityIngestionQueue(10, 10, 0.1, spool=spool, coalesce_windows={"search": 60})
+    user_id = uuid.uuid4()
+
+    def event():
+        return {
+            "id": uuid.uuid4(), "user_id": user_id, "activity_type": "search", "action": "query",
+            "resource_type": None, "resource_id": None, "activity_metadata": None, "created_at": datetime.utcnow()
+        }
+
+    async def scenario():
+        first = queue.submit(event(), "user")
+        repeat = queue.submit(event(), "user")
+        # The first event of the window is queued at once; the repeat only counts against it
+        assert queue._queue.qsize() == 1
+        assert repeat["id"] == first["id"]
+        assert repeat["activity_metadata"]["repeat_count"] == 2
+        await queue.stop()
+        return first
+
+    first = asyncio.run(scenario())
+
+    spooled = [_decode_event(record) for record in Spool.read(spool.path)]
+    assert [row["id"] for row, _ in spooled] == [first["id"], first["id"]]
+    assert spooled[0][1] == "user"
+    assert spooled[1][1] is None
+    assert spooled[1][0]["metadata"]["repeat_count"] == 2
@@ -0,0 +1,19 @@
+import asyncio
+import uuid
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.repositories import encode_cursor
+from app.api.services.user_service import UserProfileService
+
+
+@pytest.mark.parametrize("sort, order", [("updated_at", "desc"), ("created_at", "asc")])
+def test_cursor_is_rejected_under_another_ordering(sort, order):
+    cursor = encode_cursor(sort, order, datetime.utcnow(), uuid.uuid4())
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(UserProfileService(None).get_users_page(cursor=cursor, sort="created_at", order_desc=True))
+
+    assert error.value.status_code == 400